@@ -1,6 +1,4 @@
 import sys
-from src.cli import run_cli
-from src.web_app import run_web_app
 from colorama import init, Fore, Style
 
 init(autoreset=True)  # Initialize colorama
@@ -25,11 +23,18 @@ def print_cool_intro():
 def main():
     print_cool_intro()
     
-    if len(sys.argv) > 1:
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        print(Fore.GREEN + "Starting production server..." + Style.RESET_ALL)
+        from src.server import run_server
+        run_server()
+    elif len(sys.argv) > 1:
         print(Fore.GREEN + "Running in CLI mode..." + Style.RESET_ALL)
+        # Each mode imports only its own stack, so CLI runs never load Flask and vice versa
+        from src.cli import run_cli
         run_cli()
     else:
         print(Fore.GREEN + "Starting web application..." + Style.RESET_ALL)
+        from src.web_app import run_web_app
         run_web_app()
 
 if __name__ == "__main__":
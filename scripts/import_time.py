@@ -0,0 +1,66 @@
+"""Measures the import cost of each SentiTweet entry point with `python -X importtime`.
+
+    python scripts/import_time.py            # report
+    python scripts/import_time.py --check    # also fail (exit 1) when a budget is exceeded
+
+Each entry point is imported in a fresh interpreter a few times and the fastest run is kept. Besides
+the time budget, every entry point lists heavy modules it must not import at all, which catches a
+stray top-level import regardless of how fast the machine is.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module -> (budget in ms, modules that must not be imported)
+ENTRY_POINTS = {
+    'main': (150, ['pandas', 'flask', 'boto3', 'matplotlib', 'src.cli', 'src.web_app']),
+    'src.cli': (1000, ['flask', 'boto3', 'botocore', 'textblob', 'nltk', 'matplotlib', 'seaborn']),
+    'src.server': (150, ['pandas', 'flask', 'boto3', 'matplotlib']),
+    'src.web_app': (1200, ['boto3', 'botocore', 'textblob', 'nltk', 'matplotlib', 'seaborn']),
+}
+
+def measure(module):
+    # Returns (cumulative import time in ms, names of every module imported)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    total = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        name = name.strip()
+        imported.add(name)
+        if name == module and cumulative.strip().isdigit():
+            total = int(cumulative) / 1000
+    return total, imported
+
+def main():
+    parser = argparse.ArgumentParser(description='Import-time benchmark for the SentiTweet entry points')
+    parser.add_argument('--check', action='store_true', help='Exit with status 1 when an entry point is over budget or imports a forbidden module')
+    parser.add_argument('--runs', type=int, default=3, help='Fresh interpreters per entry point; the fastest is kept (default: 3)')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiply every time budget, e.g. for slow CI machines (default: 1.0)')
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'entry point':<14} {'import ms':>10} {'budget ms':>10}  forbidden imports")
+    for module, (budget, forbidden) in ENTRY_POINTS.items():
+        runs = [measure(module) for _ in range(args.runs)]
+        elapsed = min(total for total, _ in runs)
+        loaded = sorted(set(forbidden) & runs[0][1])
+        budget *= args.scale
+        print(f"{module:<14} {elapsed:>10.1f} {budget:>10.0f}  {', '.join(loaded) or '-'}")
+        if elapsed > budget:
+            failures.append(f"{module} took {elapsed:.1f} ms to import (budget {budget:.0f} ms)")
+        if loaded:
+            failures.append(f"{module} imports {', '.join(loaded)}")
+
+    if args.check and failures:
+        print('\n'.join(['', 'FAILED:'] + failures))
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
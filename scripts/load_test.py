@@ -0,0 +1,83 @@
+"""Fires concurrent /analyze requests at a running SentiTweet server and reports throughput.
+
+Compare the development server with the production one, e.g.:
+
+    python main.py                                  # then: python scripts/load_test.py
+    python main.py serve --threads 8                # then: python scripts/load_test.py
+
+The default textblob backend keeps AWS out of the measurement; pass --backend aws to include it.
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+SAMPLE_TEXTS = [
+    "I love how fast this new phone is!",
+    "The service at the restaurant was terrible and slow.",
+    "Meeting moved to 3pm, see you there.",
+    "Not sure how I feel about the new update, some good parts and some bad.",
+]
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def run(url, total, concurrency, backend):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def worker():
+        nonlocal errors
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            body = json.dumps({'tweet': f"{SAMPLE_TEXTS[index % len(SAMPLE_TEXTS)]} #{index}", 'backend': backend})
+            req = urllib.request.Request(url, data=body.encode('utf-8'), headers={'Content-Type': 'application/json'})
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(req, timeout=60) as response:
+                    response.read()
+                ok = True
+            except (urllib.error.URLError, OSError):
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+    return latencies, errors, duration
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the SentiTweet /analyze endpoint')
+    parser.add_argument('--url', default='http://127.0.0.1:5000/analyze', help='Endpoint to call (default: http://127.0.0.1:5000/analyze)')
+    parser.add_argument('--requests', type=int, default=2000, help='Total number of requests (default: 2000)')
+    parser.add_argument('--concurrency', type=int, default=32, help='Number of concurrent clients (default: 32)')
+    parser.add_argument('--backend', default='textblob', help='Analysis backend to request (default: textblob)')
+    args = parser.parse_args()
+
+    latencies, errors, duration = run(args.url, args.requests, args.concurrency, args.backend)
+    print(f"{len(latencies)} ok, {errors} failed in {duration:.2f}s")
+    print(f"Throughput: {len(latencies) / duration:.1f} req/s")
+    print(f"Latency p50 {percentile(latencies, 0.50) * 1000:.1f} ms, p95 {percentile(latencies, 0.95) * 1000:.1f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+from collections import Counter
+from src.results import SCORE_COLUMNS, SENTIMENT_LABELS, ResultBatch
+import heapq
+import itertools
+import numpy as np
+import pandas as pd
+
+# Scores lie in [0, 1]; quantiles read from 1000 fixed bins are accurate to 0.001
+SCORE_BINS = 1000
+# Counters kept for key phrases; any phrase seen in more than 1/capacity of all phrases is guaranteed to be tracked
+TOP_K_CAPACITY = 1000
+
+class SpaceSaving:
+    # Bounded heavy-hitter summary (Metwally et al.): tracks at most `capacity` items, with counts that
+    # overestimate the true frequency by at most the recorded error
+    def __init__(self, capacity=TOP_K_CAPACITY):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+
+    def update(self, counts):
+        # Merges a chunk's exact counts: tracked items add their count, new ones start from the
+        # smallest tracked count (their worst-case undercount), and only the largest `capacity` survive
+        self.total += sum(counts.values())
+        floor = min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+        for item, count in counts.items():
+            if item in self.counts:
+                self.counts[item] += count
+            else:
+                self.counts[item] = count + floor
+                self.errors[item] = floor
+        if len(self.counts) > self.capacity:
+            keep = heapq.nlargest(self.capacity, self.counts.items(), key=lambda entry: entry[1])
+            self.counts = dict(keep)
+            self.errors = {item: self.errors[item] for item in self.counts}
+
+    def top(self, n):
+        return heapq.nlargest(n, self.counts.items(), key=lambda entry: entry[1])
+
+def _nonzero_counts(values):
+    # Categorical columns report every category, including ones absent from the chunk
+    counts = values.value_counts()
+    return counts[counts > 0].to_dict()
+
+def _score_values(df, name):
+    # Scores arrive nested in aws_scores dicts, or already flattened into one column per score
+    if name in df:
+        return df[name].dropna().to_numpy(dtype=np.float64)
+    if 'aws_scores' not in df:
+        return np.empty(0)
+    scores = [score for score in df['aws_scores'] if isinstance(score, dict)]
+    return np.fromiter((score[name] for score in scores), dtype=np.float64, count=len(scores))
+
+class ResultAggregates:
+    # Everything the plots need, accumulated in one pass over result chunks; memory and plotting
+    # cost depend on the number of distinct labels, phrases tracked and text lengths, not on rows
+    def __init__(self, top_k_capacity=TOP_K_CAPACITY, score_bins=SCORE_BINS):
+        self.rows = 0
+        self.sentiments = Counter()
+        self.pairs = Counter()
+        self.score_bins = score_bins
+        self.score_histograms = {name: np.zeros(score_bins, dtype=np.int64) for name in SCORE_COLUMNS}
+        self.score_min = {name: np.inf for name in SCORE_COLUMNS}
+        self.score_max = {name: -np.inf for name in SCORE_COLUMNS}
+        self.phrases = SpaceSaving(top_k_capacity)
+        self.lengths = Counter()
+
+    def _update_scores(self, name, values):
+        if len(values):
+            bins = np.clip((values * self.score_bins).astype(np.int64), 0, self.score_bins - 1)
+            self.score_histograms[name] += np.bincount(bins, minlength=self.score_bins)
+            self.score_min[name] = min(self.score_min[name], values.min())
+            self.score_max[name] = max(self.score_max[name], values.max())
+
+    def _update_batch(self, batch):
+        # Counts straight from the batch's label codes and typed arrays; no frame is built
+        labels = np.array(SENTIMENT_LABELS, dtype=object)
+        sentiment = batch.arrays.get('aws_sentiment')
+        if sentiment is not None:
+            counts = np.bincount(sentiment[sentiment >= 0], minlength=len(labels))
+            self.sentiments.update({labels[code]: int(count) for code, count in enumerate(counts) if count})
+            textblob = batch.arrays.get('textblob_sentiment')
+            if textblob is not None:
+                both = (sentiment >= 0) & (textblob >= 0)
+                pairs = np.bincount(textblob[both].astype(np.int64) * len(labels) + sentiment[both], minlength=len(labels) ** 2)
+                self.pairs.update({(labels[code // len(labels)], labels[code % len(labels)]): int(count)
+                                   for code, count in enumerate(pairs) if count})
+
+            # char_count is the text length; rows without an AWS label are left out, as in update
+            char_count = batch.arrays['char_count']
+            keep = (sentiment >= 0) & ~char_count.isna()
+            lengths = pd.DataFrame({'length': char_count[keep].to_numpy(dtype=np.int64), 'sentiment': labels[sentiment[keep]]})
+            self.lengths.update(_nonzero_counts(lengths))
+
+        for name in SCORE_COLUMNS:
+            if name in batch.arrays:
+                values = batch.arrays[name]
+                self._update_scores(name, values[~np.isnan(values)].astype(np.float64))
+
+        if 'key_phrases' in batch.arrays:
+            self.phrases.update(_nonzero_counts(pd.Series(batch.arrays['key_phrases'].values)))
+
+    def update(self, df):
+        # df is a chunk of results as a DataFrame, or a ResultBatch
+        self.rows += len(df)
+        if isinstance(df, ResultBatch):
+            self._update_batch(df)
+            return
+        sentiment = df['aws_sentiment'] if 'aws_sentiment' in df else pd.Series(np.nan, index=df.index)
+        # Per-chunk counts are vectorized; only the small count tables are merged in Python
+        self.sentiments.update(_nonzero_counts(sentiment))
+
+        if 'textblob_sentiment' in df:
+            pairs = pd.DataFrame({'textblob': df['textblob_sentiment'], 'aws': sentiment}).dropna()
+            self.pairs.update(_nonzero_counts(pairs))
+
+        for name in SCORE_COLUMNS:
+            self._update_scores(name, _score_values(df, name))
+
+        if 'key_phrases' in df:
+            phrase_lists = [phrases for phrases in df['key_phrases'] if isinstance(phrases, list)]
+            self.phrases.update(Counter(itertools.chain.from_iterable(phrase_lists)))
+
+        if 'text' in df:
+            lengths = pd.DataFrame({'length': df['text'].str.len(), 'sentiment': sentiment}).dropna()
+            lengths['length'] = lengths['length'].astype('int64')
+            self.lengths.update(_nonzero_counts(lengths))
+
+    def sentiment_counts(self):
+        counts = sorted(self.sentiments.items(), key=lambda entry: (-entry[1], entry[0]))
+        return pd.Series(dict(counts), dtype='int64', name='count')
+
+    def crosstab(self):
+        # TextBlob labels down the rows, AWS labels across, as in a groupby/unstack
+        table = pd.Series(self.pairs, dtype='float64')
+        if table.empty:
+            return pd.DataFrame()
+        return table.unstack().sort_index().sort_index(axis=1)
+
+    def _score_quantile(self, name, fraction):
+        histogram = self.score_histograms[name]
+        cumulative = np.cumsum(histogram)
+        target = fraction * cumulative[-1]
+        index = int(np.searchsorted(cumulative, target))
+        before = cumulative[index - 1] if index else 0
+        # Linear interpolation inside the bin
+        within = (target - before) / histogram[index] if histogram[index] else 0.0
+        value = (index + within) / self.score_bins
+        return float(np.clip(value, self.score_min[name], self.score_max[name]))
+
+    def score_quantiles(self, quantiles=(0.25, 0.5, 0.75)):
+        return {name: {q: self._score_quantile(name, q) for q in quantiles}
+                for name in SCORE_COLUMNS if self.score_histograms[name].any()}
+
+    def score_box_stats(self):
+        # Box-plot statistics (Tukey whiskers at 1.5 IQR) in the form Axes.bxp draws
+        stats = []
+        for name, quantiles in self.score_quantiles().items():
+            q1, median, q3 = quantiles[0.25], quantiles[0.5], quantiles[0.75]
+            iqr = q3 - q1
+            stats.append({
+                'label': name,
+                'q1': q1,
+                'med': median,
+                'q3': q3,
+                'whislo': max(q1 - 1.5 * iqr, float(self.score_min[name])),
+                'whishi': min(q3 + 1.5 * iqr, float(self.score_max[name])),
+                'fliers': [],
+            })
+        return stats
+
+    def top_phrases(self, n=20):
+        return self.phrases.top(n)
+
+    def length_distribution(self, bins=5):
+        # Share of each AWS label within equal-width text-length bins, binned the way pd.cut does
+        if not self.lengths:
+            return pd.DataFrame()
+        counts = pd.Series(self.lengths, dtype='int64')
+        lengths = counts.index.get_level_values(0)
+        low, high = float(lengths.min()), float(lengths.max())
+        if low == high:
+            low -= 0.001 * abs(low) if low else 0.001
+            high += 0.001 * abs(high) if high else 0.001
+            edges = np.linspace(low, high, bins + 1)
+        else:
+            edges = np.linspace(low, high, bins + 1)
+            edges[0] -= (high - low) * 0.001
+        binned = pd.cut(lengths, edges)
+        table = counts.groupby([binned, counts.index.get_level_values(1)], observed=False).sum().unstack(fill_value=0)
+        return table.div(table.sum(axis=1).replace(0, np.nan), axis=0)
+
+    def summary(self, top_n=20, length_bins=5):
+        # JSON-serializable form of every aggregate, for clients that draw their own charts
+        crosstab = self.crosstab()
+        lengths = self.length_distribution(bins=length_bins)
+        return {
+            'rows': self.rows,
+            'sentiment_counts': {str(label): int(count) for label, count in self.sentiment_counts().items()},
+            'crosstab': {
+                'textblob_sentiment': [str(label) for label in crosstab.index],
+                'aws_sentiment': [str(label) for label in crosstab.columns],
+                'counts': crosstab.fillna(0).astype(int).to_numpy().tolist(),
+            },
+            'scores': [{key: value for key, value in stats.items() if key != 'fliers'} for stats in self.score_box_stats()],
+            'top_phrases': [[str(phrase), int(count)] for phrase, count in self.top_phrases(top_n)],
+            'length_distribution': {
+                'bins': [str(interval) for interval in lengths.index],
+                'shares': {str(label): lengths[label].fillna(0).round(4).tolist() for label in lengths.columns},
+            },
+        }
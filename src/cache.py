@@ -0,0 +1,149 @@
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from src.metrics import METRICS
+from src.sentiment_analyzer import with_text
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'sentitweet', 'results.sqlite')
+
+def normalize_text(text):
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+def make_key(text, language_code, version):
+    payload = '\x1f'.join([version, language_code, normalize_text(text)])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class ResultCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=None, max_entries=None, memory_entries=10000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS results_created ON results (created)')
+        self.evict()
+
+    @property
+    def hits(self):
+        return self.memory_hits + self.disk_hits
+
+    def _expired(self, created, now):
+        return self.ttl is not None and now - created > self.ttl
+
+    def _remember(self, key, value, created):
+        self.memory[key] = (value, created)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def get_many(self, keys):
+        now = time.time()
+        found = {}
+        with self.lock:
+            pending = []
+            for key in dict.fromkeys(keys):
+                entry = self.memory.get(key)
+                if entry is not None and not self._expired(entry[1], now):
+                    self.memory.move_to_end(key)
+                    found[key] = entry[0]
+                    self.memory_hits += 1
+                else:
+                    pending.append(key)
+
+            # SQLite limits the number of bound parameters per statement
+            for start in range(0, len(pending), 500):
+                batch = pending[start:start + 500]
+                placeholders = ','.join('?' * len(batch))
+                rows = self.conn.execute(f'SELECT key, value, created FROM results WHERE key IN ({placeholders})', batch)
+                for key, value, created in rows:
+                    if not self._expired(created, now):
+                        found[key] = json.loads(value)
+                        self._remember(key, found[key], created)
+                        self.disk_hits += 1
+
+            self.misses += len(pending) - sum(1 for key in pending if key in found)
+        return found
+
+    def set_many(self, items):
+        now = time.time()
+        with self.lock:
+            rows = [(key, json.dumps(value), now) for key, value in items]
+            with self.conn:
+                self.conn.executemany('INSERT OR REPLACE INTO results (key, value, created) VALUES (?, ?, ?)', rows)
+            for key, value in items:
+                self._remember(key, value, now)
+            if self.max_entries is not None:
+                self._evict_oldest()
+
+    def _evict_oldest(self):
+        with self.conn:
+            self.conn.execute(
+                'DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY created DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,))
+
+    def evict(self):
+        with self.lock:
+            if self.ttl is not None:
+                with self.conn:
+                    self.conn.execute('DELETE FROM results WHERE created < ?', (time.time() - self.ttl,))
+            if self.max_entries is not None:
+                self._evict_oldest()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+def cached_analyze(texts, analyze_batch, cache, language_code, version):
+    texts = list(texts)
+    keys = [make_key(text, language_code, version) if isinstance(text, str) else None for text in texts]
+    with METRICS.time('cache_lookup', len(texts)):
+        found = cache.get_many([key for key in keys if key is not None])
+
+    results = [None] * len(texts)
+    missing = []
+    for position, (text, key) in enumerate(zip(texts, keys)):
+        if key in found:
+            results[position] = with_text(found[key], text)
+        else:
+            missing.append(position)
+    METRICS.count('cache_hits', len(texts) - len(missing))
+    METRICS.count('cache_misses', len(missing))
+
+    if missing:
+        fresh = analyze_batch([texts[position] for position in missing])
+        to_store = []
+        for position, result in zip(missing, fresh):
+            results[position] = result
+            if 'error' not in result:
+                to_store.append((keys[position], result))
+        if to_store:
+            with METRICS.time('cache_store', len(to_store)):
+                cache.set_many(to_store)
+
+    return results
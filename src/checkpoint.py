@@ -0,0 +1,78 @@
+import json
+import os
+
+class CheckpointMismatch(ValueError):
+    pass
+
+class Checkpoint:
+    def __init__(self, path, run_info):
+        self.path = path
+        self.run_info = run_info
+        self.file = None
+
+    def _entries(self):
+        # Yields (end offset, entry) for every complete line; a torn last line from a crash is ignored
+        with open(self.path, 'rb') as f:
+            offset = 0
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                offset += len(line)
+                yield offset, entry
+
+    def scan(self):
+        # Returns the row the run can continue from and the journal size up to the last complete entry
+        if not os.path.exists(self.path):
+            return None, 0
+        next_row, valid_size = None, 0
+        for offset, entry in self._entries():
+            if next_row is None:
+                if entry != self.run_info:
+                    raise CheckpointMismatch(f"Checkpoint '{self.path}' was written by a different run: {entry}")
+                next_row = entry['start_row']
+            elif entry['start'] == next_row:
+                next_row = entry['end']
+            else:
+                break
+            valid_size = offset
+        return next_row, valid_size
+
+    def completed(self, valid_size):
+        if not valid_size:
+            return
+        for offset, entry in self._entries():
+            if offset > valid_size:
+                break
+            if 'results' in entry:
+                yield entry['start'], entry['end'], entry['results']
+
+    def open(self, valid_size=0):
+        if valid_size:
+            self.file = open(self.path, 'r+b')
+            self.file.truncate(valid_size)
+            self.file.seek(valid_size)
+        else:
+            self.file = open(self.path, 'wb')
+            self._write(self.run_info)
+
+    def _write(self, entry):
+        self.file.write(json.dumps(entry).encode('utf-8') + b'\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def record(self, start, end, results):
+        self._write({'start': start, 'end': end, 'results': results})
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def remove(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
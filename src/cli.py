@@ -1,56 +1,187 @@
 import argparse
+import codecs
+import json
 import pandas as pd
-from src.sentiment_analyzer import analyze_sentiment
-from src.visualizer import generate_visualizations
+from collections import Counter
+from src.aggregates import ResultAggregates
+from src.cache import DEFAULT_CACHE_PATH, ResultCache
+from src.checkpoint import Checkpoint, CheckpointMismatch
+from src.language import COMPREHEND_LANGUAGES, DEFAULT_LANGUAGE
+from src.metrics import METRICS, STATS_FORMATS
+from src.pipeline import DEDUPE_MODES, analyze_texts, count_languages, dedupe_summary, language_summary
+from src.results import ResultBatch
+from src.sentiment_analyzer import AUTO_LANGUAGE, BACKENDS, FEATURES, configure_comprehend_client, parse_features, result_columns
+from src.throttling import RateLimiter
+from src.visualizer import DEFAULT_DPI, PLOT_FORMATS, PLOTS, generate_visualizations, parse_plots
+from src.writers import OUTPUT_FORMATS, open_writer, output_format
 import os
 
+ENCODINGS = ['utf-8', 'iso-8859-1', 'cp1252']
+
 def read_csv_with_encoding(file_path):
-    encodings = ['utf-8', 'iso-8859-1', 'cp1252']
-    for encoding in encodings:
+    for encoding in ENCODINGS:
         try:
             return pd.read_csv(file_path, encoding=encoding)
         except UnicodeDecodeError:
             continue
-    raise ValueError(f"Unable to read the file with any of the following encodings: {', '.join(encodings)}")
+    raise ValueError(f"Unable to read the file with any of the following encodings: {', '.join(ENCODINGS)}")
 
-def process_text(text):
-    try:
-        return analyze_sentiment(text)
-    except Exception as e:
-        print(f"Error processing text: {e}")
-        return {"error": str(e)}
+def detect_encoding(file_path, block_size=1 << 20):
+    # Decodes the raw bytes incrementally, so the check never holds more than one block in memory
+    for encoding in ENCODINGS:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            with open(file_path, 'rb') as f:
+                for block in iter(lambda: f.read(block_size), b''):
+                    decoder.decode(block)
+                decoder.decode(b'', final=True)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"Unable to read the file with any of the following encodings: {', '.join(ENCODINGS)}")
+
+def read_csv_chunks(file_path, text_column, chunksize, start_row=0, end_row=None):
+    encoding = detect_encoding(file_path)
+    columns = pd.read_csv(file_path, encoding=encoding, nrows=0).columns
+    if text_column not in columns:
+        raise KeyError(list(columns))
 
-def process_texts(texts):
-    return [process_text(text) for text in texts]
+    nrows = None if end_row is None else max(0, end_row - start_row)
+    # Rows before start_row are skipped by the parser and never materialized into frames
+    skiprows = (lambda line: 0 < line <= start_row) if start_row else None
+    return pd.read_csv(file_path, encoding=encoding, usecols=[text_column], skiprows=skiprows,
+                       nrows=nrows, chunksize=chunksize)
+
+def process_texts(texts, workers=1, rate_limiter=None, cache=None, dedupe='exact', stats=None, backend='aws',
+                  features=FEATURES, language=DEFAULT_LANGUAGE, comprehend_detection=False):
+    results = analyze_texts(texts, workers=workers, rate_limiter=rate_limiter, cache=cache, dedupe=dedupe,
+                            stats=stats, backend=backend, features=features, language=language,
+                            comprehend_detection=comprehend_detection)
+    for result in results:
+        if 'error' in result:
+            print(f"Error processing text: {result['error']}")
+    return results
 
 def run_cli():
     parser = argparse.ArgumentParser(description='SentiTweet - Advanced Text Sentiment Analyzer')
     parser.add_argument('input_file', help='Path to the input CSV file containing texts to analyze')
-    parser.add_argument('output_file', help='Path to save the output CSV file with sentiment analysis results')
+    parser.add_argument('output_file', help='Path to save the sentiment analysis results (CSV unless --output_format or the extension says otherwise)')
     parser.add_argument('visualization_dir', help='Directory to save visualization images')
     parser.add_argument('--text_column', default='text', help='Name of the column containing the text to analyze (default: text)')
     parser.add_argument('--start_row', type=int, default=0, help='Starting row for analysis (0-indexed, inclusive)')
     parser.add_argument('--end_row', type=int, help='Ending row for analysis (0-indexed, exclusive). If not provided, will process until the end of the file')
+    parser.add_argument('--backend', choices=BACKENDS, default='aws', help='Analysis backend: aws (Comprehend for every text), textblob (local only, no AWS calls) or hybrid (Comprehend only for texts TextBlob finds ambiguous) (default: aws)')
+    parser.add_argument('--features', default=','.join(FEATURES), help=f'Comma-separated AWS Comprehend features to request; only these calls are made (default: {",".join(FEATURES)})')
+    parser.add_argument('--language', choices=(AUTO_LANGUAGE,) + COMPREHEND_LANGUAGES, default=DEFAULT_LANGUAGE, help='Language of the texts, or auto to detect it per text and analyze each language group with its own language code; unsupported languages are skipped (default: en)')
+    parser.add_argument('--comprehend_detection', action='store_true', help='With --language auto, ask AWS Comprehend for the language of texts the local detector cannot place instead of assuming English')
+    parser.add_argument('--stream', action='store_true', help='Read the input in chunks and append each chunk\'s results to the output file as it finishes, keeping memory use flat')
+    parser.add_argument('--resume', action='store_true', help='Continue an interrupted streaming run from its checkpoint file (<output_file>.checkpoint); implies --stream')
+    parser.add_argument('--chunksize', type=int, default=10000, help='Number of rows per chunk in streaming mode (default: 10000)')
+    parser.add_argument('--workers', type=int, default=1, help='Number of concurrent AWS Comprehend batch requests to keep in flight (default: 1)')
+    parser.add_argument('--rate_limit', type=float, help='Maximum AWS Comprehend requests per second across all workers (default: unlimited)')
+    parser.add_argument('--dedupe', choices=DEDUPE_MODES, default='exact', help='Analyze each distinct text once: exact duplicates, texts identical after cleaning, or none (default: exact)')
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help=f'Path of the on-disk result cache (default: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--no-cache', dest='no_cache', action='store_true', help='Disable the result cache and always call AWS Comprehend')
+    parser.add_argument('--cache_ttl', type=float, help='Expire cached results older than this many seconds (default: never)')
+    parser.add_argument('--cache_max_entries', type=int, help='Maximum number of results kept in the on-disk cache (default: unlimited)')
+    parser.add_argument('--max_pool_connections', type=int, help='Maximum number of pooled HTTP connections to AWS Comprehend (default: max(10, workers))')
+    parser.add_argument('--retry_mode', choices=['legacy', 'standard', 'adaptive'], default='standard', help='botocore retry mode for AWS Comprehend calls; retries themselves are made by the app through the rate limiter, so this mainly selects adaptive client-side rate limiting (default: standard)')
+    parser.add_argument('--connect_timeout', type=float, default=5, help='Connection timeout in seconds for AWS Comprehend calls (default: 5)')
+    parser.add_argument('--read_timeout', type=float, default=30, help='Read timeout in seconds for AWS Comprehend calls (default: 30)')
+    parser.add_argument('--output_format', '--output-format', choices=OUTPUT_FORMATS, help='Format of the results file: csv, jsonl, parquet or arrow (default: from the output file extension, otherwise csv)')
+    parser.add_argument('--plots', default=','.join(PLOTS), help=f'Comma-separated plots to draw (default: {",".join(PLOTS)})')
+    parser.add_argument('--format', dest='plot_format', choices=PLOT_FORMATS, default='png', help='Image format of the visualizations (default: png)')
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI, help=f'Resolution of raster visualizations in dots per inch (default: {DEFAULT_DPI})')
+    parser.add_argument('--stats', nargs='?', const='summary', choices=STATS_FORMATS, help='Print per-stage timings (p50/p95/p99 latency, rows/sec) and retry/throttle counters at the end of the run, as a summary table (default) or JSON')
+    parser.add_argument('--stats_file', help='Also write the JSON stats report to this file')
     
     args = parser.parse_args()
 
-    print("Loading input data...")
+    if args.workers < 1:
+        print("Error: --workers must be at least 1.")
+        return
+    if args.resume:
+        args.stream = True
     try:
-        input_df = read_csv_with_encoding(args.input_file)
+        args.features = parse_features(args.features)
+        args.plots = parse_plots(args.plots)
+        args.output_format = output_format(args.output_file, args.output_format)
     except ValueError as e:
         print(f"Error: {e}")
         return
+
+    configure_comprehend_client(
+        max_pool_connections=args.max_pool_connections or max(10, args.workers),
+        retry_mode=args.retry_mode,
+        connect_timeout=args.connect_timeout,
+        read_timeout=args.read_timeout,
+    )
+
+    # One limiter for the whole run, so streamed chunks share its schedule instead of each starting afresh
+    rate_limiter = RateLimiter(args.rate_limit) if args.rate_limit else None
+
+    cache = None
+    if not args.no_cache:
+        cache = ResultCache(args.cache, ttl=args.cache_ttl, max_entries=args.cache_max_entries)
+
+    stats = Counter()
+    METRICS.reset()
+    try:
+        if args.stream:
+            completed = run_streaming(args, cache, stats, rate_limiter)
+        else:
+            completed = run_in_memory(args, cache, stats, rate_limiter)
+    finally:
+        if cache is not None:
+            cache.close()
+    if not completed:
+        return
+
+    print(dedupe_summary(stats))
+    if stats['restored_rows']:
+        print(f"Resumed: {stats['restored_rows']} rows restored from the checkpoint + {stats['rows']} analyzed "
+              f"in this run = {stats['restored_rows'] + stats['rows']} rows")
+    if args.language == AUTO_LANGUAGE:
+        print(language_summary(stats))
+    if cache is not None:
+        cache_stats = cache.stats()
+        print(f"Cache: {cache_stats['hits']} hits ({cache_stats['memory_hits']} memory, {cache_stats['disk_hits']} disk), "
+              f"{cache_stats['misses']} misses, hit ratio {cache_stats['hit_ratio']:.1%}")
+
+    print("Analysis complete!")
+    print(f"Visualizations saved in {args.visualization_dir}")
+    report_stats(args)
+
+def report_stats(args):
+    if args.stats == 'summary':
+        print(METRICS.summary())
+    elif args.stats == 'json':
+        print(json.dumps(METRICS.report(), indent=2))
+    if args.stats_file:
+        with open(args.stats_file, 'w') as f:
+            json.dump(METRICS.report(), f, indent=2)
+        print(f"Stats saved to {args.stats_file}")
+
+def run_in_memory(args, cache, stats, rate_limiter=None):
+    print("Loading input data...")
+    try:
+        with METRICS.time('csv_read') as timer:
+            input_df = read_csv_with_encoding(args.input_file)
+            timer.rows = len(input_df)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return False
     except FileNotFoundError:
         print(f"Error: Input file '{args.input_file}' not found.")
-        return
+        return False
     except pd.errors.EmptyDataError:
         print(f"Error: Input file '{args.input_file}' is empty.")
-        return
+        return False
 
     if args.text_column not in input_df.columns:
         print(f"Error: Column '{args.text_column}' not found in the input file.")
         print(f"Available columns: {', '.join(input_df.columns)}")
-        return
+        return False
 
     # Select rows based on start_row and end_row
     if args.end_row is None:
@@ -59,19 +190,105 @@ def run_cli():
     input_df = input_df.iloc[args.start_row:args.end_row]
 
     print(f"Processing texts from row {args.start_row} to {args.end_row-1}...")
-    results = process_texts(input_df[args.text_column])
-    results_df = pd.DataFrame(results)
+    results = process_texts(input_df[args.text_column], workers=args.workers, rate_limiter=rate_limiter,
+                            cache=cache, dedupe=args.dedupe, stats=stats, backend=args.backend,
+                            features=args.features, language=args.language,
+                            comprehend_detection=args.comprehend_detection)
+    # Packed into typed arrays right away; the result dicts are dropped once the batch is built
+    batch = ResultBatch.from_results(results, result_columns(args.features))
+    del results
 
     print("Saving results...")
-    results_df.to_csv(args.output_file, index=False)
+    with open_writer(args.output_file, batch.columns, args.output_format) as writer:
+        writer.write(batch)
     print(f"Results saved to {args.output_file}")
 
     print("Generating visualizations...")
     os.makedirs(args.visualization_dir, exist_ok=True)
-    generate_visualizations(results_df, args.visualization_dir)
+    generate_visualizations(batch, args.visualization_dir, plots=args.plots, fmt=args.plot_format, dpi=args.dpi)
+    return True
 
-    print("Analysis complete!")
-    print(f"Visualizations saved in {args.visualization_dir}")
+def run_streaming(args, cache, stats, rate_limiter=None):
+    checkpoint = Checkpoint(args.output_file + '.checkpoint', {
+        'input_file': os.path.abspath(args.input_file),
+        'text_column': args.text_column,
+        'start_row': args.start_row,
+        'end_row': args.end_row,
+        'backend': args.backend,
+        'features': list(args.features),
+        'language': args.language,
+        'comprehend_detection': args.comprehend_detection,
+    })
+    next_row, valid_size = None, 0
+    if args.resume:
+        try:
+            next_row, valid_size = checkpoint.scan()
+        except CheckpointMismatch as e:
+            print(f"Error: {e}")
+            return False
+        if next_row is None:
+            print(f"No checkpoint found at '{checkpoint.path}', starting from row {args.start_row}.")
+        else:
+            print(f"Resuming from row {next_row}...")
+    if next_row is None:
+        next_row = args.start_row
+
+    print("Streaming input data...")
+    try:
+        chunks = read_csv_chunks(args.input_file, args.text_column, args.chunksize, next_row, args.end_row)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return False
+    except FileNotFoundError:
+        print(f"Error: Input file '{args.input_file}' not found.")
+        return False
+    except pd.errors.EmptyDataError:
+        print(f"Error: Input file '{args.input_file}' is empty.")
+        return False
+    except KeyError as e:
+        print(f"Error: Column '{args.text_column}' not found in the input file.")
+        print(f"Available columns: {', '.join(e.args[0])}")
+        return False
+
+    # Each chunk is parsed lazily as the loop asks for it, so its read is timed there
+    chunks = METRICS.timed('csv_read', chunks)
+    columns = result_columns(args.features)
+    # Plot statistics are folded in chunk by chunk, so the full result set is never held in memory
+    aggregates = ResultAggregates()
+    rows = 0
+    with open_writer(args.output_file, columns, args.output_format) as writer:
+        # The output is rebuilt from the journal so it is identical to an uninterrupted run,
+        # even if the previous run died between journaling a chunk and writing it out
+        for start, end, results in checkpoint.completed(valid_size):
+            batch = ResultBatch.from_results(results, columns)
+            writer.write(batch)
+            aggregates.update(batch)
+            rows += len(results)
+            # Restored rows count toward the run totals: the row count and the per-language summary
+            stats['restored_rows'] += len(results)
+            count_languages(results, args.backend, stats)
+
+        checkpoint.open(valid_size)
+        for chunk in chunks:
+            results = process_texts(chunk[args.text_column], workers=args.workers, rate_limiter=rate_limiter,
+                                    cache=cache, dedupe=args.dedupe, stats=stats, backend=args.backend,
+                                    features=args.features, language=args.language,
+                                    comprehend_detection=args.comprehend_detection)
+            checkpoint.record(next_row, next_row + len(results), results)
+            next_row += len(results)
+
+            # A fixed column set keeps the header (or schema) valid for every appended chunk
+            batch = ResultBatch.from_results(results, columns)
+            writer.write(batch)
+            aggregates.update(batch)
+            rows += len(results)
+            print(f"Processed rows {args.start_row} to {args.start_row + rows - 1}...")
+    checkpoint.remove()
+    print(f"Results saved to {args.output_file}")
+
+    print("Generating visualizations...")
+    generate_visualizations(aggregates, args.visualization_dir, plots=args.plots, fmt=args.plot_format, dpi=args.dpi)
+    return True
 
 if __name__ == "__main__":
     run_cli()
\ No newline at end of file
@@ -1,15 +1,16 @@
 import pandas as pd
-from src.sentiment_analyzer import analyze_sentiment
+from src.sentiment_analyzer import RESULT_COLUMNS, analyze_sentiment_batch
+from src.writers import open_writer
 
 def load_tweets(file_path):
     return pd.read_csv(file_path)
 
 def process_tweets(tweets_df):
-    results = []
-    for _, row in tweets_df.iterrows():
-        result = analyze_sentiment(row['text'])
-        results.append(result)
-    return pd.DataFrame(results)
+    return pd.DataFrame(analyze_sentiment_batch(tweets_df['text']))
 
-def save_results(results_df, output_path):
-    results_df.to_csv(output_path, index=False)
\ No newline at end of file
+def save_results(results_df, output_path, fmt=None):
+    # fmt is one of writers.OUTPUT_FORMATS; by default it follows the file extension (CSV otherwise)
+    # Only the result columns are written; per-row bookkeeping such as 'language' is not part of the output
+    columns = [column for column in RESULT_COLUMNS if column in results_df.columns]
+    with open_writer(output_path, columns, fmt) as writer:
+        writer.write(results_df)
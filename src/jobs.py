@@ -0,0 +1,112 @@
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from src.pipeline import analyze_texts, language_counts
+from src.result_store import ResultTable
+from src.sentiment_analyzer import FEATURES, result_columns
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+class Job:
+    def __init__(self, texts, options):
+        self.id = uuid.uuid4().hex
+        self.texts = texts
+        self.options = options
+        self.status = 'queued'
+        self.total = len(texts)
+        self.done = 0
+        self.results = []
+        self.table = None
+        self.stats = Counter()
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+
+    def progress(self):
+        elapsed = None
+        throughput = None
+        eta = None
+        if self.started is not None:
+            elapsed = (self.finished or time.time()) - self.started
+            if elapsed > 0 and self.done:
+                throughput = self.done / elapsed
+                eta = (self.total - self.done) / throughput
+        return {
+            'id': self.id,
+            'status': self.status,
+            'rows_done': self.done,
+            'rows_total': self.total,
+            'unique_texts': self.stats['unique_texts'],
+            'languages': language_counts(self.stats),
+            'elapsed_seconds': elapsed,
+            'rows_per_second': throughput,
+            'eta_seconds': eta,
+            'error': self.error,
+        }
+
+class JobManager:
+    def __init__(self, workers=2, chunk_size=500, max_jobs=100):
+        self.chunk_size = chunk_size
+        self.max_jobs = max_jobs
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sentitweet-job')
+
+    def submit(self, texts, **options):
+        job = Job(list(texts), options)
+        with self.lock:
+            self.jobs[job.id] = job
+            self._forget_old_jobs()
+        self.executor.submit(self._run, job)
+        return job
+
+    def add_completed(self, results, **options):
+        # Registers results analyzed elsewhere (e.g. a streaming request) so they can be paged and exported
+        job = Job([], options)
+        job.total = job.done = len(results)
+        job.started = job.finished = time.time()
+        job.results = results
+        self._finish(job)
+        with self.lock:
+            self.jobs[job.id] = job
+            self._forget_old_jobs()
+        return job
+
+    def _finish(self, job):
+        job.table = ResultTable(job.results, result_columns(job.options.get('features', FEATURES)))
+        job.results = None
+        job.status = 'done'
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def _forget_old_jobs(self):
+        # Finished jobs keep their results in memory, so only the newest max_jobs are retained
+        for job_id in list(self.jobs):
+            if len(self.jobs) <= self.max_jobs:
+                break
+            if self.jobs[job_id].status in ('done', 'failed'):
+                del self.jobs[job_id]
+
+    def _run(self, job):
+        job.status = 'running'
+        job.started = time.time()
+        try:
+            for start in range(0, job.total, self.chunk_size):
+                chunk = job.texts[start:start + self.chunk_size]
+                job.results.extend(analyze_texts(chunk, stats=job.stats, **job.options))
+                job.done += len(chunk)
+            self._finish(job)
+        except Exception as e:
+            logger.exception(f"Job {job.id} failed")
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished = time.time()
+            # The input is no longer needed once every row has a result
+            job.texts = None
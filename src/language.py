@@ -0,0 +1,127 @@
+from functools import lru_cache
+from src.metrics import METRICS
+from src.throttling import call_with_backoff
+import re
+
+# Languages Comprehend's sentiment, key phrase and entity APIs accept
+COMPREHEND_LANGUAGES = ('ar', 'de', 'en', 'es', 'fr', 'hi', 'it', 'ja', 'ko', 'pt', 'zh', 'zh-TW')
+# Texts no detector can place (e.g. a tweet of names and emoji) keep the previous assumption
+DEFAULT_LANGUAGE = 'en'
+# langdetect guesses on very short texts are unreliable, so those fall through to the word lists
+MIN_DETECT_LENGTH = 20
+MIN_CONFIDENCE = 0.9
+# BatchDetectDominantLanguage accepts at most 25 documents per request
+DETECT_BATCH_SIZE = 25
+
+# Non-Latin scripts mostly identify the language on their own; scripts shared by several languages
+# map to the most common one, which only matters for the skipped-language counts
+SCRIPTS = [
+    ('ko', re.compile("[\uac00-\ud7af\u1100-\u11ff\u3130-\u318f]")),
+    ('ja', re.compile("[\u3040-\u30ff]")),
+    ('zh', re.compile("[\u4e00-\u9fff]")),
+    ('ar', re.compile("[\u0600-\u06ff]")),
+    ('hi', re.compile("[\u0900-\u097f]")),
+    ('ru', re.compile("[\u0400-\u04ff]")),
+    ('el', re.compile("[\u0370-\u03ff]")),
+    ('he', re.compile("[\u0590-\u05ff]")),
+    ('th', re.compile("[\u0e00-\u0e7f]")),
+]
+LATIN = re.compile("[A-Za-z\u00c0-\u024f]")
+WORD_PATTERN = re.compile(r"[^\W\d_]+")
+
+# Frequent function words of the Latin-script languages Comprehend supports. Single letters are left
+# out: 'a', 'e', 'o' and 'y' are words in several of these languages, and 'a' is English too
+STOPWORDS = {
+    'en': {'the', 'and', 'is', 'are', 'was', 'you', 'of', 'to', 'in', 'it', 'that', 'this', 'for', 'with', 'have',
+           'not', 'be', 'on', 'my', 'am', 'me', 'so', 'just', 'what', 'at', 'but', 'all', 'can', 'will', 'your'},
+    'de': {'der', 'die', 'und', 'das', 'ist', 'nicht', 'ich', 'du', 'ein', 'eine', 'mit', 'zu', 'den', 'von', 'sie',
+           'es', 'auf', 'für', 'sich', 'auch', 'wir', 'aber', 'noch', 'wie', 'war', 'heute', 'sehr', 'dem', 'im', 'mein'},
+    'es': {'el', 'la', 'que', 'los', 'las', 'es', 'en', 'un', 'una', 'por', 'con', 'no', 'para', 'lo', 'muy',
+           'pero', 'se', 'del', 'al', 'yo', 'mi', 'está', 'como', 'más', 'hoy', 'tengo', 'este', 'esta', 'qué'},
+    'fr': {'le', 'la', 'les', 'et', 'est', 'je', 'tu', 'un', 'une', 'des', 'que', 'pas', 'pour', 'dans', 'ce', 'il',
+           'elle', 'avec', 'sur', 'du', 'au', 'nous', 'vous', 'mais', 'très', 'suis', 'mon', 'ma', 'qui'},
+    'it': {'il', 'lo', 'la', 'che', 'di', 'è', 'non', 'un', 'una', 'per', 'con', 'sono', 'gli', 'le', 'del',
+           'della', 'ma', 'mi', 'ho', 'molto', 'questo', 'questa', 'oggi', 'anche', 'io', 'ti', 'come', 'nel', 'alla'},
+    'pt': {'os', 'as', 'que', 'de', 'é', 'não', 'um', 'uma', 'para', 'com', 'em', 'do', 'da', 'eu',
+           'mas', 'muito', 'se', 'no', 'na', 'meu', 'minha', 'hoje', 'você', 'está', 'isso', 'esse', 'estou'},
+}
+# A word-list guess needs this many function words, and at least STOPWORD_LEAD times the runner-up's
+MIN_STOPWORD_HITS = 2
+STOPWORD_LEAD = 2
+LANGDETECT_CODES = {'zh-cn': 'zh', 'zh-tw': 'zh-TW'}
+
+@lru_cache(maxsize=None)
+def _langdetect():
+    # Optional dependency, imported on first use
+    try:
+        from langdetect import DetectorFactory, detect_langs
+    except ImportError:
+        return None
+    DetectorFactory.seed = 0  # deterministic guesses
+    return detect_langs
+
+def _script_language(text):
+    # The language of the dominant non-Latin script, 'latin', or None for text without letters
+    if text.isascii():
+        return 'latin' if LATIN.search(text) else None
+    counts = {code: len(pattern.findall(text)) for code, pattern in SCRIPTS}
+    counts['latin'] = len(LATIN.findall(text))
+    # Kanji appear in Japanese too; any kana makes it Japanese
+    if counts['ja']:
+        counts['ja'] += counts.pop('zh')
+    code, count = max(counts.items(), key=lambda item: item[1])
+    return code if count else None
+
+def _stopword_language(text):
+    words = WORD_PATTERN.findall(text.lower())
+    hits = {code: sum(word in stopwords for word in words) for code, stopwords in STOPWORDS.items()}
+    ranked = sorted(hits.items(), key=lambda item: item[1], reverse=True)
+    # Short texts share function words across these languages, so one hit or a narrow lead decides nothing
+    (code, best), (_, runner_up) = ranked[:2]
+    if best < MIN_STOPWORD_HITS or best < STOPWORD_LEAD * runner_up:
+        return None
+    return code
+
+def detect_language(text):
+    # Local detection: a language code, or None when the text gives too little to go on
+    script = _script_language(text)
+    if script != 'latin':
+        return script
+    detect_langs = _langdetect()
+    if detect_langs is not None and len(text) >= MIN_DETECT_LENGTH:
+        try:
+            best = detect_langs(text)[0]
+        except Exception:
+            best = None
+        if best is not None and best.prob >= MIN_CONFIDENCE:
+            return LANGDETECT_CODES.get(best.lang, best.lang)
+    return _stopword_language(text)
+
+def _truncate(text, max_bytes):
+    # The opening of a text is enough to detect its language
+    return text.encode('utf-8')[:max_bytes].decode('utf-8', errors='ignore')
+
+def detect_languages(texts, comprehend=None, rate_limiter=None, max_bytes=5000):
+    # One language code per text. Texts the local detector cannot place are sent to Comprehend's
+    # BatchDetectDominantLanguage when a client is given, and otherwise get DEFAULT_LANGUAGE
+    with METRICS.time('language_detection', len(texts)):
+        languages = [detect_language(text) for text in texts]
+    undetermined = [index for index, language in enumerate(languages) if language is None]
+    if comprehend is not None:
+        for start in range(0, len(undetermined), DETECT_BATCH_SIZE):
+            indices = undetermined[start:start + DETECT_BATCH_SIZE]
+            chunk = [_truncate(texts[index], max_bytes) for index in indices]
+
+            def request():
+                with METRICS.time('comprehend.batch_detect_dominant_language', len(chunk)):
+                    return comprehend.batch_detect_dominant_language(TextList=chunk)
+            try:
+                response = call_with_backoff(request, rate_limiter)
+            except Exception:
+                # Detection is best effort; these texts keep the default
+                continue
+            for item in response['ResultList']:
+                if item['Languages']:
+                    best = max(item['Languages'], key=lambda language: language['Score'])
+                    languages[indices[item['Index']]] = best['LanguageCode']
+    return [language or DEFAULT_LANGUAGE for language in languages]
@@ -0,0 +1,177 @@
+from collections import Counter
+import bisect
+import threading
+import time
+
+# Upper bounds (seconds) of the latency buckets: 100 µs doubling up to about 105 s, then +Inf.
+# Fixed buckets keep an observation to one bisect and one increment, cheap enough to stay on in production
+BUCKETS = tuple(0.0001 * 2 ** exponent for exponent in range(21))
+QUANTILES = (0.5, 0.95, 0.99)
+STATS_FORMATS = ('summary', 'json')
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+class Histogram:
+    __slots__ = ('buckets', 'count', 'sum', 'min', 'max', 'rows')
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.rows = 0
+
+    def observe(self, seconds, rows=0):
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.rows += rows
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        # Interpolates linearly inside the bucket holding the q-th observation, like Prometheus'
+        # histogram_quantile; the smallest and largest observations bound the estimate
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.buckets):
+            if count and cumulative + count >= rank:
+                if index == len(BUCKETS):
+                    return self.max
+                lower = max(BUCKETS[index - 1] if index else 0.0, self.min)
+                upper = min(BUCKETS[index], self.max)
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.max
+
+class Timer:
+    # Context manager timing one stage run; set rows inside the block when the count is only known then
+    __slots__ = ('metrics', 'stage', 'rows', 'start')
+
+    def __init__(self, metrics, stage, rows):
+        self.metrics = metrics
+        self.stage = stage
+        self.rows = rows
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start, self.rows)
+
+class Metrics:
+    # Per-stage latency histograms and event counters of one process, safe to update from any thread
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.monotonic()
+            self.stages = {}
+            self.counters = Counter()
+
+    def observe(self, stage, seconds, rows=0):
+        with self.lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram()
+            histogram.observe(seconds, rows)
+
+    def time(self, stage, rows=0):
+        return Timer(self, stage, rows)
+
+    def timed(self, stage, iterable):
+        # Yields the items of iterable, timing each fetch; suits lazily read chunks such as pandas' chunked reader
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.observe(stage, time.perf_counter() - start, len(item))
+            yield item
+
+    def count(self, name, amount=1):
+        if amount:
+            with self.lock:
+                self.counters[name] += amount
+
+    def report(self):
+        # JSON-ready snapshot: wall time and row throughput since the last reset, then per-stage
+        # call counts, rows, total time, latency percentiles (ms) and rows/sec while in that stage
+        with self.lock:
+            elapsed = time.monotonic() - self.started
+            counters = dict(self.counters)
+            stages = {}
+            for name, histogram in sorted(self.stages.items()):
+                stage = {'calls': histogram.count, 'rows': histogram.rows, 'total_seconds': round(histogram.sum, 6),
+                         'mean_ms': round(histogram.sum / histogram.count * 1000, 3)}
+                for q in QUANTILES:
+                    stage[f'p{round(q * 100)}_ms'] = round(histogram.quantile(q) * 1000, 3)
+                stage['max_ms'] = round(histogram.max * 1000, 3)
+                stage['rows_per_second'] = round(histogram.rows / histogram.sum, 1) if histogram.rows and histogram.sum else None
+                stages[name] = stage
+        rows = counters.get('rows', 0)
+        return {
+            'elapsed_seconds': round(elapsed, 3),
+            'rows': rows,
+            'rows_per_second': round(rows / elapsed, 1) if elapsed else None,
+            'stages': stages,
+            'counters': counters,
+        }
+
+    def summary(self):
+        report = self.report()
+        lines = [f"Throughput: {report['rows']} rows in {report['elapsed_seconds']:.2f} s "
+                 f"({report['rows_per_second'] or 0:.1f} rows/s)"]
+        if report['stages']:
+            width = max(len('stage'), *(len(name) for name in report['stages']))
+            lines.append(f"{'stage':<{width}} {'calls':>7} {'rows':>9} {'total s':>9} {'p50 ms':>9} {'p95 ms':>9} "
+                         f"{'p99 ms':>9} {'rows/s':>10}")
+            for name, stage in report['stages'].items():
+                rate = f"{stage['rows_per_second']:.1f}" if stage['rows_per_second'] else '-'
+                lines.append(f"{name:<{width}} {stage['calls']:>7} {stage['rows']:>9} {stage['total_seconds']:>9.3f} "
+                             f"{stage['p50_ms']:>9.2f} {stage['p95_ms']:>9.2f} {stage['p99_ms']:>9.2f} {rate:>10}")
+        counters = ', '.join(f"{name} {count}" for name, count in sorted(report['counters'].items()) if name != 'rows')
+        lines.append(f"Counters: {counters or 'none'}")
+        return '\n'.join(lines)
+
+    def prometheus(self, prefix='sentitweet'):
+        # Text exposition format: one histogram with a stage label, one counter per event
+        with self.lock:
+            elapsed = time.monotonic() - self.started
+            stages = {name: (list(histogram.buckets), histogram.sum, histogram.count, histogram.rows)
+                      for name, histogram in sorted(self.stages.items())}
+            counters = sorted(self.counters.items())
+        lines = [f'# HELP {prefix}_stage_seconds Time spent in each pipeline stage',
+                 f'# TYPE {prefix}_stage_seconds histogram']
+        for name, (buckets, total, count, _) in stages.items():
+            label = _label(name)
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS + (float('inf'),), buckets):
+                cumulative += bucket
+                le = '+Inf' if bound == float('inf') else f'{bound:.6g}'
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{label}",le="{le}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{label}"}} {total:.6f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{label}"}} {count}')
+        lines += [f'# HELP {prefix}_stage_rows_total Rows handled by each pipeline stage',
+                  f'# TYPE {prefix}_stage_rows_total counter']
+        lines += [f'{prefix}_stage_rows_total{{stage="{_label(name)}"}} {rows}' for name, (*_, rows) in stages.items()]
+        for name, count in counters:
+            lines += [f'# TYPE {prefix}_{name}_total counter', f'{prefix}_{name}_total {count}']
+        lines += [f'# HELP {prefix}_uptime_seconds Seconds since the metrics were last reset',
+                  f'# TYPE {prefix}_uptime_seconds gauge', f'{prefix}_uptime_seconds {elapsed:.3f}']
+        return '\n'.join(lines) + '\n'
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+# Process-wide registry the pipeline reports into
+METRICS = Metrics()
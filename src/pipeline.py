@@ -0,0 +1,96 @@
+from collections import Counter
+from src.cache import cached_analyze
+from src.language import DEFAULT_LANGUAGE
+from src.metrics import METRICS
+from src.sentiment_analyzer import ANALYZER_VERSION, BACKEND_LANGUAGES, FEATURES, analyze_sentiment_batch, clean_tweet, with_text
+
+DEDUPE_MODES = ('none', 'exact', 'clean')
+
+def _dedupe_key(text, mode):
+    if mode == 'clean' and isinstance(text, str):
+        return clean_tweet(text)
+    try:
+        hash(text)
+    except TypeError:
+        # Unhashable values (lists, dicts) are never merged; the analyzer reports each one as invalid
+        return object()
+    return text
+
+def deduplicated_analyze(texts, analyze_batch, mode='exact', stats=None):
+    texts = list(texts)
+    if mode == 'none':
+        unique_results = analyze_batch(texts)
+        owners = range(len(texts))
+    else:
+        slots = {}
+        unique = []
+        owners = []
+        for text in texts:
+            key = _dedupe_key(text, mode)
+            if key not in slots:
+                slots[key] = len(unique)
+                unique.append(text)
+            owners.append(slots[key])
+        unique_results = analyze_batch(unique)
+
+    if stats is not None:
+        stats['rows'] += len(texts)
+        stats['unique_texts'] += len(unique_results)
+    return [with_text(unique_results[owner], text) for owner, text in zip(owners, texts)]
+
+def analyze_texts(texts, workers=1, rate_limiter=None, cache=None, dedupe='exact', stats=None, backend='aws',
+                  features=FEATURES, language=DEFAULT_LANGUAGE, comprehend_detection=False):
+    def analyze(batch):
+        return analyze_sentiment_batch(batch, workers=workers, rate_limiter=rate_limiter, backend=backend,
+                                       features=features, language=language,
+                                       comprehend_detection=comprehend_detection)
+
+    def analyze_cached(batch):
+        version = f"{ANALYZER_VERSION}/{backend}/{','.join(features)}"
+        # Detected languages follow from the text, so 'auto' is a stable key; only the fallback can change them
+        language_key = f"{language}+comprehend" if comprehend_detection else language
+        return cached_analyze(batch, analyze, cache, language_key, version)
+
+    texts = list(texts)
+    with METRICS.time('analysis', len(texts)):
+        results = deduplicated_analyze(texts, analyze if cache is None else analyze_cached, dedupe, stats)
+    if stats is not None:
+        count_languages(results, backend, stats)
+    METRICS.count('rows', len(results))
+    METRICS.count('row_errors', sum('error' in result for result in results))
+    return results
+
+def count_languages(results, backend, stats):
+    # Counted per row once results are fanned back out, so duplicates and cache hits count like any row
+    for result in results:
+        language = result.get('language')
+        if language is not None:
+            stats[('language', language)] += 1
+            if language not in BACKEND_LANGUAGES[backend]:
+                stats[('skipped', language)] += 1
+
+def dedupe_summary(stats):
+    rows, unique = stats['rows'], stats['unique_texts']
+    ratio = rows / unique if unique else 1.0
+    return f"Deduplication: {rows} rows -> {unique} unique texts ({ratio:.2f}x fewer analyses)"
+
+def language_counts(stats):
+    # Rows analyzed per detected language, and rows skipped because the language is unsupported
+    counts = {'analyzed': {}, 'skipped': {}}
+    # Snapshot first: job progress reads the counter while the job is still adding to it
+    for key, count in list(stats.items()):
+        if isinstance(key, tuple) and count:
+            kind, language = key
+            if kind == 'language':
+                analyzed = count - stats[('skipped', language)]
+                if analyzed:
+                    counts['analyzed'][language] = analyzed
+            elif kind == 'skipped':
+                counts['skipped'][language] = count
+    return counts
+
+def language_summary(stats):
+    counts = language_counts(stats)
+    analyzed = ', '.join(f"{language} {count}" for language, count in Counter(counts['analyzed']).most_common()) or 'none'
+    skipped = ', '.join(f"{language} {count}" for language, count in Counter(counts['skipped']).most_common()) or 'none'
+    return f"Languages: {analyzed}; skipped (unsupported): {skipped}"
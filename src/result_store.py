@@ -0,0 +1,101 @@
+from src.aggregates import ResultAggregates
+from src.results import LABEL_CODES, SCORE_COLUMNS, SENTIMENT_COLUMNS, ResultBatch
+import numpy as np
+import pandas as pd
+
+SORTABLE_COLUMNS = ['index', 'text', 'aws_sentiment', 'textblob_sentiment', 'word_count', 'char_count'] + SCORE_COLUMNS
+
+class ResultTable:
+    # A finished job's results held as one ResultBatch, with the lookups the results API needs
+    # (sort orders, entity-type masks, lowercased text) built once
+    def __init__(self, results, columns):
+        self.columns = columns
+        self.size = len(results)
+        self.batch = ResultBatch.from_results(results, columns)
+        arrays = self.batch.arrays
+
+        self.search_text = pd.Series(arrays['text']).str.lower()
+        self.entity_masks = {}
+        if 'entities' in arrays:
+            entities = arrays['entities']
+            # Row of every flat entity; failed rows own no entities, so they never match
+            rows = np.repeat(np.arange(self.size), np.diff(entities.offsets))
+            types = entities.values['Type']
+            for code, entity_type in enumerate(types.categories):
+                mask = np.zeros(self.size, dtype=bool)
+                mask[rows[types.codes == code]] = True
+                self.entity_masks[entity_type] = mask
+        self.sort_orders = {}
+        self._aggregates = None
+
+    def iter_batches(self, chunk_size=1000):
+        for start in range(0, self.size, chunk_size):
+            yield self.batch.take(np.arange(start, min(start + chunk_size, self.size)))
+
+    def iter_records(self, chunk_size=1000):
+        for start in range(0, self.size, chunk_size):
+            yield self.records(np.arange(start, min(start + chunk_size, self.size)))
+
+    def aggregates(self):
+        # Built on first request; the table never changes once built
+        if self._aggregates is None:
+            aggregates = ResultAggregates()
+            aggregates.update(self.batch)
+            self._aggregates = aggregates
+        return self._aggregates
+
+    def entity_types(self):
+        return sorted(self.entity_masks)
+
+    def _sort_order(self, column, descending):
+        key = (column, descending)
+        if key not in self.sort_orders:
+            if column == 'index':
+                order = np.arange(self.size)[::-1] if descending else np.arange(self.size)
+            else:
+                # Labels sort by name rather than by their code
+                values = self.batch.labels(column).astype(object) if column in SENTIMENT_COLUMNS else self.batch.arrays[column]
+                # Stable sort keeps input order among equal values; missing values go last either way
+                order = pd.Series(values).sort_values(ascending=not descending, kind='stable', na_position='last').index.to_numpy()
+            self.sort_orders[key] = order
+        return self.sort_orders[key]
+
+    def _mask(self, sentiment=None, textblob_sentiment=None, entity_type=None, query=None):
+        mask = np.ones(self.size, dtype=bool)
+        for column, label in (('aws_sentiment', sentiment), ('textblob_sentiment', textblob_sentiment)):
+            if label and column in self.batch.arrays:
+                # An unknown label matches no row
+                mask &= self.batch.arrays[column] == LABEL_CODES.get(label, -2)
+        if entity_type:
+            mask &= self.entity_masks.get(entity_type, np.zeros(self.size, dtype=bool))
+        if query:
+            mask &= self.search_text.str.contains(query.lower(), regex=False).fillna(False).to_numpy(dtype=bool)
+        return mask
+
+    def records(self, rows):
+        records = []
+        for record in self.batch.take(rows).records():
+            # Failed rows keep the shape the analyzer gave them
+            if record['error'] is not None:
+                records.append({'error': record['error']})
+            else:
+                records.append({column: value for column, value in record.items() if column != 'error'})
+        return records
+
+    def page(self, page=1, per_page=50, sort='index', descending=False, **filters):
+        if sort not in SORTABLE_COLUMNS or (sort != 'index' and sort not in self.batch.arrays):
+            raise ValueError(f"Cannot sort by '{sort}'")
+        order = self._sort_order(sort, descending)
+        mask = self._mask(**filters)
+        matching = order[mask[order]]
+
+        start = (page - 1) * per_page
+        rows = matching[start:start + per_page]
+        return {
+            'page': page,
+            'per_page': per_page,
+            'total_rows': self.size,
+            'matching_rows': int(len(matching)),
+            'pages': int(-(-len(matching) // per_page)) if per_page else 0,
+            'rows': [dict(record, index=int(row)) for row, record in zip(rows, self.records(rows))],
+        }
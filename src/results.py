@@ -0,0 +1,221 @@
+import itertools
+import numpy as np
+import operator
+import pandas as pd
+
+SCORE_COLUMNS = ['Positive', 'Negative', 'Neutral', 'Mixed']
+# Every label Comprehend and TextBlob produce, in a fixed order so label codes mean the same in every batch
+SENTIMENT_LABELS = ['POSITIVE', 'NEGATIVE', 'NEUTRAL', 'MIXED']
+SENTIMENT_COLUMNS = ('aws_sentiment', 'textblob_sentiment')
+LABEL_CODES = {label: code for code, label in enumerate(SENTIMENT_LABELS)}
+COUNT_COLUMNS = ('word_count', 'char_count')
+LIST_COLUMNS = ('key_phrases', 'entities')
+
+def output_columns(columns):
+    # Result columns with the aws_scores dict replaced by one column per score
+    flat = []
+    for column in columns:
+        flat.extend(SCORE_COLUMNS if column == 'aws_scores' else [column])
+    return flat
+
+def arrow_schema(columns):
+    import pyarrow as pa
+    # large_string is the layout pandas' Arrow-backed strings already use, so text converts without copying
+    label = pa.dictionary(pa.int8(), pa.string())
+    types = {
+        'text': pa.large_string(),
+        'aws_sentiment': label,
+        'textblob_sentiment': label,
+        'key_phrases': pa.list_(pa.large_string()),
+        'entities': pa.list_(pa.struct([('Text', pa.large_string()), ('Type', pa.large_string())])),
+        'word_count': pa.int32(),
+        'char_count': pa.int32(),
+        'error': pa.large_string(),
+    }
+    types.update({name: pa.float32() for name in SCORE_COLUMNS})
+    return pa.schema([(column, types[column]) for column in output_columns(columns)])
+
+def _missing(value):
+    return value is None or value != value
+
+def _label_codes(column, values):
+    # int8 codes into SENTIMENT_LABELS, -1 for missing; an unknown label would change what codes mean
+    unknown = {value for value in set(values) if isinstance(value, str)} - LABEL_CODES.keys()
+    if unknown:
+        raise ValueError(f"Unexpected {column} label(s): {', '.join(sorted(unknown))}")
+    # None and NaN are not labels, so they fall through to -1 as well
+    return np.array([LABEL_CODES.get(value, -1) for value in values], dtype=np.int8)
+
+def _decimal_scores(values):
+    # float32 scores widened to float64 and rounded to 7 significant digits, the precision float32 holds,
+    # so 0.9 reads back as 0.9 instead of 0.8999999761581421; same as float(f"{v:.7g}"), vectorized
+    values = values.astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        exponent = np.floor(np.log10(np.abs(values)))
+    scale = 10.0 ** (6 - np.where(np.isfinite(exponent), exponent, 0))
+    return np.round(values * scale) / scale
+
+def _strings(values):
+    # Arrow-backed when pyarrow is installed: one contiguous buffer instead of a Python object per string
+    return pd.array(values, dtype='string')
+
+class ListColumn:
+    # A list per row stored flat: row i owns values[offsets[i]:offsets[i + 1]]; invalid rows (failed
+    # analyses) have no list at all, unlike rows whose list is empty. int32 offsets match Arrow's list layout
+    __slots__ = ('offsets', 'valid', 'values')
+
+    def __init__(self, offsets, valid, values):
+        self.offsets = offsets
+        self.valid = valid
+        self.values = values
+
+    def split(self, flat):
+        # Cuts the flat Python list of values back into one list per row (None for invalid rows)
+        offsets = self.offsets.tolist()
+        return [flat[offsets[row]:offsets[row + 1]] if valid else None for row, valid in enumerate(self.valid.tolist())]
+
+    def take(self, rows):
+        # The lists of the given rows, in that order, with their values gathered into a new flat array
+        starts = self.offsets[rows]
+        lengths = self.offsets[rows + 1] - starts
+        offsets = np.zeros(len(rows) + 1, dtype=np.int32)
+        np.cumsum(lengths, out=offsets[1:])
+        positions = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        if isinstance(self.values, dict):
+            values = {name: column[positions] for name, column in self.values.items()}
+        else:
+            values = self.values[positions]
+        return ListColumn(offsets, self.valid[rows], values)
+
+class ResultBatch:
+    # Analysis results stored column by column in typed arrays: float32 scores, int8 label codes
+    # (-1 = null), Int32 counts, Arrow-backed strings and flat list columns. Holds the columns of
+    # result_columns(features); build one with from_results
+    def __init__(self, columns, arrays):
+        self.columns = list(columns)
+        self.arrays = arrays
+        self.size = len(arrays['text'])
+
+    def __len__(self):
+        return self.size
+
+    @classmethod
+    def from_results(cls, results, columns):
+        # Packs result dicts (or the rows of a results DataFrame, where missing values are NaN) column by column
+        if isinstance(results, pd.DataFrame):
+            results = results.to_dict('records')
+        size = len(results)
+
+        def values(column):
+            return [result.get(column) for result in results]
+
+        arrays = {'text': _strings(values('text')), 'error': _strings(values('error'))}
+        for column in SENTIMENT_COLUMNS:
+            if column in columns:
+                arrays[column] = _label_codes(column, values(column))
+        if 'aws_scores' in columns:
+            get_scores = operator.itemgetter(*SCORE_COLUMNS)
+            missing = (np.nan,) * len(SCORE_COLUMNS)
+            rows = (get_scores(score) if isinstance(score, dict) else missing for score in values('aws_scores'))
+            scores = np.fromiter(itertools.chain.from_iterable(rows), dtype=np.float32,
+                                 count=size * len(SCORE_COLUMNS)).reshape(size, len(SCORE_COLUMNS))
+            # Transposed once, so each score column is a contiguous array of its own
+            arrays.update(zip(SCORE_COLUMNS, np.ascontiguousarray(scores.T)))
+        for column in COUNT_COLUMNS:
+            arrays[column] = pd.array(values(column), dtype='Int32')
+        for column in LIST_COLUMNS:
+            if column not in columns:
+                continue
+            lists = values(column)
+            lengths = np.array([len(items) if isinstance(items, list) else -1 for items in lists], dtype=np.int32)
+            valid = lengths >= 0
+            offsets = np.zeros(size + 1, dtype=np.int32)
+            np.cumsum(np.maximum(lengths, 0), out=offsets[1:])
+            flat = list(itertools.chain.from_iterable(items for items in lists if isinstance(items, list)))
+            if column == 'key_phrases':
+                arrays[column] = ListColumn(offsets, valid, _strings(flat))
+            else:
+                # Entity types come from a small fixed vocabulary, so they are stored as category codes
+                entities = {'Text': _strings([entity['Text'] for entity in flat]),
+                            'Type': pd.Categorical([entity['Type'] for entity in flat])}
+                arrays[column] = ListColumn(offsets, valid, entities)
+        return cls(columns, arrays)
+
+    def take(self, rows):
+        # A batch of the given rows (row numbers, in the order wanted); no other row is copied or converted
+        rows = np.asarray(rows, dtype=np.intp)
+        arrays = {column: data.take(rows) if isinstance(data, ListColumn) else data[rows]
+                  for column, data in self.arrays.items()}
+        return ResultBatch(self.columns, arrays)
+
+    def labels(self, column):
+        return pd.Categorical.from_codes(self.arrays[column], categories=SENTIMENT_LABELS)
+
+    def _lists(self, column):
+        # Python lists (of str, or of {'Text', 'Type'} dicts) per row, None for failed rows
+        data = self.arrays[column]
+        if column == 'key_phrases':
+            return data.split(data.values.tolist())
+        entities = [{'Text': text, 'Type': kind} for text, kind in zip(data.values['Text'].tolist(), data.values['Type'].tolist())]
+        return data.split(entities)
+
+    def to_pandas(self):
+        # Flat frame in output_columns order. Scores, labels, counts and strings wrap the batch's
+        # arrays without copying; list columns become Python lists, which pandas has no typed form for
+        frame = {}
+        for column in output_columns(self.columns):
+            if column in SENTIMENT_COLUMNS:
+                frame[column] = self.labels(column)
+            elif column in LIST_COLUMNS:
+                frame[column] = self._lists(column)
+            else:
+                frame[column] = self.arrays[column]
+        return pd.DataFrame(frame, copy=False)
+
+    def to_arrow(self):
+        # Table in arrow_schema(columns); numeric buffers, string buffers and list offsets are shared with the batch
+        import pyarrow as pa
+        schema = arrow_schema(self.columns)
+        label_dictionary = pa.array(SENTIMENT_LABELS, type=pa.string())
+        arrays = []
+        for field in schema:
+            data = self.arrays[field.name]
+            if field.name in SENTIMENT_COLUMNS:
+                array = pa.DictionaryArray.from_arrays(pa.array(data, mask=data < 0), label_dictionary)
+            elif field.name in LIST_COLUMNS:
+                if field.name == 'key_phrases':
+                    values = pa.array(data.values)
+                else:
+                    types = pa.array(data.values['Type']).dictionary_decode()
+                    values = pa.StructArray.from_arrays([pa.array(data.values['Text']), types], names=['Text', 'Type'])
+                values = values.cast(field.type.value_type)
+                array = pa.ListArray.from_arrays(pa.array(data.offsets), values, mask=pa.array(~data.valid))
+            else:
+                array = pa.array(data, from_pandas=True)
+            arrays.append(array if array.type == field.type else array.cast(field.type))
+        return pa.Table.from_arrays(arrays, schema=schema)
+
+    def records(self):
+        # The original result dicts (nested aws_scores, lists of phrases and entities), row by row
+        columns = {column: self.arrays[column].to_numpy(dtype=object, na_value=None) for column in ('text', 'error')}
+        for column in SENTIMENT_COLUMNS:
+            if column in self.arrays:
+                codes = self.arrays[column]
+                columns[column] = np.where(codes >= 0, np.array(SENTIMENT_LABELS, dtype=object)[codes], None)
+        for column in COUNT_COLUMNS:
+            columns[column] = self.arrays[column].to_numpy(dtype=object, na_value=None)
+        for column in LIST_COLUMNS:
+            if column in self.arrays:
+                columns[column] = self._lists(column)
+        has_scores = 'aws_scores' in self.columns
+        if has_scores:
+            scores = _decimal_scores(np.column_stack([self.arrays[name] for name in SCORE_COLUMNS]))
+        for row in range(self.size):
+            record = {}
+            for column in self.columns:
+                if column == 'aws_scores':
+                    score = scores[row]
+                    record[column] = None if np.isnan(score).all() else dict(zip(SCORE_COLUMNS, score.tolist()))
+                else:
+                    record[column] = columns[column][row]
+            yield record
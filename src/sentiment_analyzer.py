@@ -1,11 +1,166 @@
-import boto3
-from textblob import TextBlob
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from src.language import COMPREHEND_LANGUAGES, DEFAULT_LANGUAGE, detect_languages
+from src.metrics import METRICS
+from src.throttling import call_with_backoff
+import numpy as np
+import os
+import pandas as pd
 import re
+import threading
+
+# BatchDetect* calls accept at most 25 documents per request
+BATCH_SIZE = 25
+# ... and at most this many UTF-8 bytes per document; longer texts are analyzed as several segments
+MAX_DOCUMENT_BYTES = 5000
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+RESULT_COLUMNS = ['text', 'aws_sentiment', 'aws_scores', 'textblob_sentiment', 'key_phrases', 'entities',
+                  'word_count', 'char_count', 'error']
+
+# Optional Comprehend calls and the result columns each one fills
+FEATURES = ('sentiment', 'key_phrases', 'entities')
+FEATURE_COLUMNS = {
+    'sentiment': ['aws_sentiment', 'aws_scores'],
+    'key_phrases': ['key_phrases'],
+    'entities': ['entities'],
+}
+
+CLEAN_PATTERN = re.compile(r"(@[A-Za-z0-9]+)|([^0-9A-Za-z \t])|(\w+:\/\/\S+)")
+# After cleaning, spaces and tabs are the only whitespace left
+WHITESPACE_PATTERN = re.compile(r"[ \t]+")
+
+BACKENDS = ('aws', 'textblob', 'hybrid')
+# Languages each backend can analyze; texts in any other language are skipped without a call.
+# TextBlob's lexicon is English-only, so hybrid sends every non-English text to Comprehend
+BACKEND_LANGUAGES = {
+    'aws': COMPREHEND_LANGUAGES,
+    'textblob': ('en',),
+    'hybrid': COMPREHEND_LANGUAGES,
+}
+# Language option value that detects each text's language instead of assuming one
+AUTO_LANGUAGE = 'auto'
+# In hybrid mode, texts whose local polarity is closer to zero than this are sent to Comprehend
+HYBRID_POLARITY_THRESHOLD = 0.1
+
+# Batches at least this large are scored locally across a process pool
+TEXTBLOB_PARALLEL_THRESHOLD = 50000
+TEXTBLOB_CHUNK_SIZE = 10000
+
+# Bump whenever the shape or meaning of analysis results changes, so cached results are not reused
+ANALYZER_VERSION = '2'
+
+CLIENT_OPTIONS = {
+    'max_pool_connections': 10,
+    'retry_mode': 'standard',
+    # Attempts per request, the first included: call_with_backoff owns retries; see configure_comprehend_client
+    'total_max_attempts': 1,
+    'connect_timeout': 5,
+    'read_timeout': 30,
+}
+
+_client = None
+_client_pid = None
+_client_injected = False
+_client_lock = threading.Lock()
+
+def configure_comprehend_client(**options):
+    # Every Comprehend call goes through throttling.call_with_backoff, which retries throttling and
+    # transient errors after waiting on the shared RateLimiter. botocore's own retries would skip the
+    # limiter and multiply with those (5 x 6 requests per logical call, just when the service is
+    # throttling), so total_max_attempts stays 1 unless botocore is meant to retry as well
+    global _client
+    unknown = set(options) - set(CLIENT_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown Comprehend client options: {', '.join(sorted(unknown))}")
+    with _client_lock:
+        CLIENT_OPTIONS.update(options)
+        # An injected client is kept; only clients built from the options are rebuilt
+        if not _client_injected:
+            _client = None
+
+def set_comprehend_client(client):
+    global _client, _client_pid, _client_injected
+    with _client_lock:
+        _client = client
+        _client_pid = os.getpid()
+        _client_injected = client is not None
+
+def get_comprehend_client():
+    global _client, _client_pid
+    # Clients are thread-safe but must not be shared across a fork, so a forked
+    # worker builds its own on first use
+    if _client is None or (_client_pid != os.getpid() and not _client_injected):
+        with _client_lock:
+            if _client is None or (_client_pid != os.getpid() and not _client_injected):
+                # boto3 is imported on first use so local-only runs never load it
+                import boto3
+                from botocore.config import Config
+                config = Config(
+                    max_pool_connections=CLIENT_OPTIONS['max_pool_connections'],
+                    retries={'mode': CLIENT_OPTIONS['retry_mode'], 'total_max_attempts': CLIENT_OPTIONS['total_max_attempts']},
+                    connect_timeout=CLIENT_OPTIONS['connect_timeout'],
+                    read_timeout=CLIENT_OPTIONS['read_timeout'],
+                )
+                _client = boto3.session.Session().client('comprehend', config=config)
+                _client_pid = os.getpid()
+    return _client
+
+def parse_features(value):
+    if value is None:
+        return FEATURES
+    if isinstance(value, str):
+        value = value.split(',')
+    features = [feature.strip() for feature in value if feature.strip()]
+    unknown = [feature for feature in features if feature not in FEATURES]
+    if unknown:
+        raise ValueError(f"Unknown features: {', '.join(unknown)}. Choose from: {', '.join(FEATURES)}")
+    return tuple(feature for feature in FEATURES if feature in features)
+
+def result_columns(features=FEATURES):
+    skipped = {column for feature in FEATURES if feature not in features for column in FEATURE_COLUMNS[feature]}
+    return [column for column in RESULT_COLUMNS if column not in skipped]
 
 def clean_tweet(tweet):
-    return ' '.join(re.sub(r"(@[A-Za-z0-9]+)|([^0-9A-Za-z \t])|(\w+:\/\/\S+)", " ", tweet).split())
+    return ' '.join(CLEAN_PATTERN.sub(" ", tweet).split())
+
+def clean_tweets(tweets):
+    tweets = pd.Series(tweets, dtype=object)
+    return tweets.str.replace(CLEAN_PATTERN, ' ', regex=True).str.replace(WHITESPACE_PATTERN, ' ', regex=True).str.strip()
+
+def _polarities(cleaned):
+    # Same scorer TextBlob's default PatternAnalyzer calls, minus the per-text blob construction.
+    # TextBlob (and NLTK behind it) is imported on first use, which also covers pool workers
+    from textblob.en import sentiment as pattern_sentiment
+    return [pattern_sentiment(text)[0] for text in cleaned]
+
+def get_textblob_polarities(tweets, workers=None):
+    # Each distinct cleaned text is scored once and the polarity broadcast back to its rows
+    with METRICS.time('clean') as timer:
+        codes, uniques = pd.factorize(clean_tweets(tweets))
+        timer.rows = len(codes)
+    cleaned = uniques.tolist()
+    if workers is None:
+        workers = os.cpu_count() if len(cleaned) >= TEXTBLOB_PARALLEL_THRESHOLD else 1
+    if workers > 1 and len(cleaned) > TEXTBLOB_CHUNK_SIZE:
+        chunks = [cleaned[start:start + TEXTBLOB_CHUNK_SIZE] for start in range(0, len(cleaned), TEXTBLOB_CHUNK_SIZE)]
+        with METRICS.time('textblob', len(cleaned)), ProcessPoolExecutor(max_workers=workers) as executor:
+            polarities = [polarity for chunk in executor.map(_polarities, chunks) for polarity in chunk]
+    else:
+        with METRICS.time('textblob', len(cleaned)):
+            polarities = _polarities(cleaned)
+    return np.array(polarities, dtype=float)[codes]
+
+def polarity_labels(polarities):
+    # NaN marks texts TextBlob cannot score (not English), which get no label
+    labels = np.select([polarities > 0, polarities < 0], ['POSITIVE', 'NEGATIVE'], 'NEUTRAL').astype(object)
+    labels[np.isnan(polarities)] = None
+    return labels.tolist()
+
+def get_textblob_sentiments(tweets, workers=None):
+    return polarity_labels(get_textblob_polarities(tweets, workers))
 
 def get_textblob_sentiment(tweet):
+    from textblob import TextBlob
     analysis = TextBlob(clean_tweet(tweet))
     if analysis.sentiment.polarity > 0:
         return 'POSITIVE'
@@ -14,22 +169,261 @@ def get_textblob_sentiment(tweet):
     else:
         return 'NEUTRAL'
 
-def analyze_sentiment(tweet):
-    comprehend = boto3.client('comprehend')
-    
-    aws_response = comprehend.detect_sentiment(Text=tweet, LanguageCode='en')
-    key_phrases = comprehend.detect_key_phrases(Text=tweet, LanguageCode='en')
-    entities = comprehend.detect_entities(Text=tweet, LanguageCode='en')
-    
-    textblob_sentiment = get_textblob_sentiment(tweet)
-    
-    return {
-        'text': tweet,
-        'aws_sentiment': aws_response['Sentiment'],
-        'aws_scores': aws_response['SentimentScore'],
-        'textblob_sentiment': textblob_sentiment,
-        'key_phrases': [phrase['Text'] for phrase in key_phrases['KeyPhrases']],
-        'entities': [{'Text': entity['Text'], 'Type': entity['Type']} for entity in entities['Entities']],
-        'word_count': len(tweet.split()),
-        'char_count': len(tweet)
-    }
\ No newline at end of file
+def build_result(tweet, sentiment, key_phrases, entities, textblob_sentiment):
+    # Comprehend fields are only present for the features that were requested (None = not requested)
+    result = {'text': tweet}
+    if sentiment is not None:
+        result['aws_sentiment'] = sentiment['Sentiment']
+        result['aws_scores'] = sentiment['SentimentScore']
+    result['textblob_sentiment'] = textblob_sentiment
+    if key_phrases is not None:
+        result['key_phrases'] = [phrase['Text'] for phrase in key_phrases]
+    if entities is not None:
+        result['entities'] = [{'Text': entity['Text'], 'Type': entity['Type']} for entity in entities]
+    result['word_count'] = len(tweet.split())
+    result['char_count'] = len(tweet)
+    return result
+
+def build_local_result(tweet, textblob_sentiment, features=FEATURES):
+    # Same columns as build_result; Comprehend-only fields are null when no AWS call was made
+    result = {'text': tweet}
+    for column in result_columns(features):
+        if column not in ('text', 'error'):
+            result[column] = None
+    result['textblob_sentiment'] = textblob_sentiment
+    result['word_count'] = len(tweet.split())
+    result['char_count'] = len(tweet)
+    return result
+
+def with_text(result, text):
+    # Results shared between texts that only differ in whitespace or cleaning keep row-local fields
+    if 'error' in result or result.get('text') == text:
+        return result
+    return dict(result, text=text, word_count=len(text.split()), char_count=len(text))
+
+def analyze_sentiment(tweet, comprehend=None, **options):
+    # One text through the batch path, so it is split, routed by language and limited to the requested
+    # features exactly like every other text; options are those of analyze_sentiment_batch
+    return analyze_sentiment_batch([tweet], comprehend, **options)[0]
+
+def _utf8_length(text):
+    return len(text.encode('utf-8'))
+
+def _split_bytes(text, max_bytes):
+    # Last resort for a single token over the limit: cut at the byte limit, backed off to a character boundary
+    encoded = text.encode('utf-8')
+    pieces = []
+    while encoded:
+        cut = min(max_bytes, len(encoded))
+        while cut < len(encoded) and encoded[cut] & 0xC0 == 0x80:
+            cut -= 1
+        pieces.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+    return pieces
+
+def split_text(text, max_bytes=MAX_DOCUMENT_BYTES):
+    # Texts over Comprehend's byte limit become as few segments as possible, cut at sentence
+    # boundaries, then at whitespace inside an oversized sentence. A character is at most 4 bytes,
+    # so short texts are returned without encoding them
+    if len(text) * 4 <= max_bytes or _utf8_length(text) <= max_bytes:
+        return [text]
+    pieces = []
+    for sentence in SENTENCE_BOUNDARY.split(text):
+        sentence = sentence.strip()
+        if _utf8_length(sentence) <= max_bytes:
+            pieces.append(sentence)
+            continue
+        for word in sentence.split():
+            pieces.extend([word] if _utf8_length(word) <= max_bytes else _split_bytes(word, max_bytes))
+
+    segments, current, size = [], [], 0
+    for piece in pieces:
+        if not piece:
+            continue
+        length = _utf8_length(piece)
+        if current and size + 1 + length > max_bytes:
+            segments.append(' '.join(current))
+            current, size = [], 0
+        size += length + (1 if current else 0)
+        current.append(piece)
+    if current:
+        segments.append(' '.join(current))
+    return segments
+
+def _collect_batch(response, key, results, errors):
+    for item in response['ResultList']:
+        results[item['Index']] = item if key is None else item[key]
+    for error in response['ErrorList']:
+        errors.setdefault(error['Index'], error['ErrorMessage'])
+
+def _detect_chunk(comprehend, chunk, features=FEATURES, rate_limiter=None, language=DEFAULT_LANGUAGE):
+    # Raw Comprehend output per document: {'sentiment', 'key_phrases', 'entities'} (None for features
+    # not requested), or {'error': message}
+    def call(name):
+        operation = getattr(comprehend, name)
+
+        # Timed per attempt, so rate-limit waits and backoff sleeps are not counted as call latency
+        def request():
+            with METRICS.time(f'comprehend.{name}', len(chunk)):
+                return operation(TextList=chunk, LanguageCode=language)
+        return call_with_backoff(request, rate_limiter)
+
+    sentiments, key_phrases, entities, errors = {}, {}, {}, {}
+    try:
+        if 'sentiment' in features:
+            _collect_batch(call('batch_detect_sentiment'), None, sentiments, errors)
+        if 'key_phrases' in features:
+            _collect_batch(call('batch_detect_key_phrases'), 'KeyPhrases', key_phrases, errors)
+        if 'entities' in features:
+            _collect_batch(call('batch_detect_entities'), 'Entities', entities, errors)
+    except Exception as e:
+        # A request-level failure (credentials, retries exhausted, ...) fails every document of the chunk
+        return [{"error": str(e)} for _ in chunk]
+
+    return [{"error": errors[index]} if index in errors else
+            {'sentiment': sentiments.get(index), 'key_phrases': key_phrases.get(index), 'entities': entities.get(index)}
+            for index in range(len(chunk))]
+
+def _unique(items, key):
+    # First occurrence of each key, in order
+    unique = {}
+    for item in items:
+        unique.setdefault(key(item), item)
+    return list(unique.values())
+
+def _merge_segments(detected, segments):
+    # One result for a text analyzed in segments: sentiment scores averaged weighted by segment
+    # length, the label taken from the highest merged score, phrases and entities deduplicated
+    merged = {'sentiment': None, 'key_phrases': None, 'entities': None}
+    if detected[0]['sentiment'] is not None:
+        weights = [len(segment) for segment in segments]
+        names = detected[0]['sentiment']['SentimentScore']
+        scores = {name: sum(output['sentiment']['SentimentScore'][name] * weight for output, weight in zip(detected, weights)) / sum(weights)
+                  for name in names}
+        merged['sentiment'] = {'Sentiment': max(scores, key=scores.get).upper(), 'SentimentScore': scores}
+    if detected[0]['key_phrases'] is not None:
+        phrases = [phrase for output in detected for phrase in output['key_phrases']]
+        merged['key_phrases'] = _unique(phrases, key=lambda phrase: phrase['Text'])
+    if detected[0]['entities'] is not None:
+        entities = [entity for output in detected for entity in output['entities']]
+        merged['entities'] = _unique(entities, key=lambda entity: (entity['Text'], entity['Type']))
+    return merged
+
+def _segment_result(text, textblob_sentiment, segments, detected):
+    for index, output in enumerate(detected):
+        if 'error' in output:
+            prefix = f"Segment {index + 1} of {len(segments)}: " if len(segments) > 1 else ''
+            return {"error": prefix + output['error']}
+    output = detected[0] if len(segments) == 1 else _merge_segments(detected, segments)
+    return build_result(text, output['sentiment'], output['key_phrases'], output['entities'], textblob_sentiment)
+
+def _aws_backend(texts, polarities, comprehend, workers, rate_limiter, features, language):
+    if not texts or not features:
+        return _textblob_backend(texts, polarities, comprehend, workers, rate_limiter, features, language)
+    if comprehend is None:
+        comprehend = get_comprehend_client()
+
+    labels = polarity_labels(polarities)
+    # Every text becomes one or more documents within the byte limit, packed BATCH_SIZE to a call
+    segments = [split_text(text) for text in texts]
+    documents = [segment for text_segments in segments for segment in text_segments]
+    batches = [documents[start:start + BATCH_SIZE] for start in range(0, len(documents), BATCH_SIZE)]
+
+    def run(batch):
+        return _detect_chunk(comprehend, batch, features, rate_limiter, language)
+
+    # Each worker keeps one batch in flight; map() yields in submission order
+    if workers > 1 and len(batches) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            batch_results = list(executor.map(run, batches))
+    else:
+        batch_results = [run(batch) for batch in batches]
+    detected = [output for chunk_results in batch_results for output in chunk_results]
+
+    results = []
+    position = 0
+    for text, label, text_segments in zip(texts, labels, segments):
+        results.append(_segment_result(text, label, text_segments, detected[position:position + len(text_segments)]))
+        position += len(text_segments)
+    return results
+
+def _textblob_backend(texts, polarities, comprehend, workers, rate_limiter, features, language):
+    return [build_local_result(text, label, features) for text, label in zip(texts, polarity_labels(polarities))]
+
+def _hybrid_backend(texts, polarities, comprehend, workers, rate_limiter, features, language):
+    results = _textblob_backend(texts, polarities, comprehend, workers, rate_limiter, features, language)
+    # Texts TextBlob could not score (NaN) always go to Comprehend
+    ambiguous = np.flatnonzero(~(np.abs(polarities) >= HYBRID_POLARITY_THRESHOLD))
+    aws_results = _aws_backend([texts[i] for i in ambiguous], polarities[ambiguous], comprehend, workers,
+                               rate_limiter, features, language)
+    for i, result in zip(ambiguous, aws_results):
+        results[i] = result
+    return results
+
+_BACKEND_FUNCTIONS = {
+    'aws': _aws_backend,
+    'textblob': _textblob_backend,
+    'hybrid': _hybrid_backend,
+}
+
+def parse_language(value):
+    # A Comprehend language code, or 'auto' to detect each text's language
+    language = value or DEFAULT_LANGUAGE
+    if language != AUTO_LANGUAGE and language not in COMPREHEND_LANGUAGES:
+        raise ValueError(f"Unsupported language '{language}'. Choose '{AUTO_LANGUAGE}' or one of: {', '.join(COMPREHEND_LANGUAGES)}")
+    return language
+
+def analyze_sentiment_batch(texts, comprehend=None, workers=1, rate_limiter=None, backend='aws', features=FEATURES,
+                            language=DEFAULT_LANGUAGE, comprehend_detection=False):
+    # language is a Comprehend language code, or 'auto' to detect it per text (locally, and with
+    # comprehend_detection through Comprehend for texts the local detector cannot place). Texts are
+    # grouped by language and each group is analyzed with its own LanguageCode. Every result of a
+    # valid text records that code under 'language', so it survives caching and can be counted per row
+    if backend not in _BACKEND_FUNCTIONS:
+        raise ValueError(f"Unknown backend '{backend}'. Choose one of: {', '.join(BACKENDS)}")
+    language = parse_language(language)
+    features = parse_features(features)
+
+    texts = list(texts)
+    results = [None] * len(texts)
+
+    # Comprehend rejects the whole batch on an empty or non-string document, so those
+    # rows are failed up front and only valid texts are sent
+    valid = []
+    for position, text in enumerate(texts):
+        if isinstance(text, str) and text.strip():
+            valid.append(position)
+        else:
+            results[position] = {"error": f"Invalid text: {text!r}"}
+
+    valid_texts = [texts[position] for position in valid]
+    if language == AUTO_LANGUAGE:
+        if comprehend_detection and comprehend is None:
+            comprehend = get_comprehend_client()
+        languages = detect_languages(valid_texts, comprehend if comprehend_detection else None, rate_limiter,
+                                     MAX_DOCUMENT_BYTES)
+    else:
+        languages = [language] * len(valid_texts)
+    groups = {}
+    for position, text_language in zip(valid, languages):
+        groups.setdefault(text_language, []).append(position)
+
+    for text_language, positions in groups.items():
+        if text_language not in BACKEND_LANGUAGES[backend]:
+            for position in positions:
+                results[position] = {"error": f"Unsupported language '{text_language}' for the {backend} backend",
+                                     'language': text_language}
+            continue
+
+        group_texts = [texts[position] for position in positions]
+        # TextBlob only scores English; other languages get NaN polarities and no TextBlob label
+        if text_language == 'en':
+            polarities = get_textblob_polarities(group_texts)
+        else:
+            polarities = np.full(len(group_texts), np.nan)
+        group_results = _BACKEND_FUNCTIONS[backend](group_texts, polarities, comprehend, workers, rate_limiter,
+                                                    features, text_language)
+        for position, result in zip(positions, group_results):
+            results[position] = dict(result, language=text_language)
+
+    return results
@@ -0,0 +1,86 @@
+import argparse
+import logging
+import os
+import sys
+
+logger = logging.getLogger(__name__)
+
+SERVERS = ('auto', 'gunicorn', 'waitress')
+LOG_FORMAT = '%(asctime)s %(process)d %(levelname)s %(name)s: %(message)s'
+
+def init_worker():
+    # Runs once in the server process so the first requests don't pay for client or lexicon setup
+    from src.sentiment_analyzer import _polarities, get_comprehend_client
+    try:
+        get_comprehend_client()
+    except Exception as e:
+        logger.warning(f"Could not create the AWS Comprehend client: {e}")
+    _polarities(['warm up'])
+    logger.info(f"Worker {os.getpid()} ready")
+
+def resolve_server(server):
+    if server != 'auto':
+        return server
+    try:
+        import gunicorn  # noqa: F401
+        # gunicorn only runs on Unix
+        if os.name == 'posix':
+            return 'gunicorn'
+    except ImportError:
+        pass
+    return 'waitress'
+
+def serve_gunicorn(app, host, port, threads, timeout):
+    from gunicorn.app.base import BaseApplication
+
+    class SentiTweetApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'{host}:{port}')
+            # One process: jobs, paged results and metrics live in its memory, so every request must reach it
+            self.cfg.set('workers', 1)
+            self.cfg.set('threads', threads)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('timeout', timeout)
+            self.cfg.set('loglevel', logging.getLevelName(logging.getLogger().level).lower())
+            self.cfg.set('post_fork', lambda server, worker: init_worker())
+
+        def load(self):
+            return app
+
+    SentiTweetApplication().run()
+
+def serve_waitress(app, host, port, threads, timeout):
+    from waitress import serve
+    init_worker()
+    serve(app, host=host, port=port, threads=threads, channel_timeout=timeout)
+
+def serve(host='127.0.0.1', port=5000, threads=8, server='auto', timeout=120):
+    from src.web_app import app
+    server = resolve_server(server)
+    logger.info(f"Serving on http://{host}:{port} with {server} (1 process x {threads} threads)")
+    try:
+        if server == 'gunicorn':
+            serve_gunicorn(app, host, port, threads, timeout)
+        else:
+            serve_waitress(app, host, port, threads, timeout)
+    except ImportError:
+        print(f"Error: the {server} server is not installed. Install it with 'pip install {server}'.")
+        return False
+    return True
+
+def run_server(argv=None):
+    parser = argparse.ArgumentParser(prog='main.py serve', description='Run the SentiTweet web application under a production WSGI server')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind to (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=5000, help='Port to listen on (default: 5000)')
+    parser.add_argument('--threads', type=int, default=8, help='Number of request threads; the server runs one process, so this is how it scales (default: 8)')
+    parser.add_argument('--server', choices=SERVERS, default='auto', help='WSGI server: gunicorn (Unix) or waitress (any platform); auto picks gunicorn when it is installed (default: auto)')
+    parser.add_argument('--timeout', type=int, default=120, help='Seconds before an unresponsive request is dropped (default: 120)')
+    parser.add_argument('--log_level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], default='INFO', help='Log level; DEBUG logs every analyzed text and result (default: INFO)')
+    args = parser.parse_args(sys.argv[2:] if argv is None else argv)
+
+    if args.threads < 1:
+        print("Error: --threads must be at least 1.")
+        return False
+    # force: importing the visualizer already configured the root logger
+    logging.basicConfig(level=args.log_level, format=LOG_FORMAT, force=True)
+    return serve(args.host, args.port, args.threads, args.server, args.timeout)
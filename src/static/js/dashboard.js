@@ -0,0 +1,397 @@
+const form = document.getElementById('tweet-form');
+const results = document.getElementById('results');
+const pasteBtn = document.getElementById('paste-btn');
+let charts = {};
+
+form.addEventListener('submit', async (e) => {
+    e.preventDefault();
+    const tweet = document.getElementById('tweet-input').value;
+    const backend = document.getElementById('tweet-backend').value;
+    try {
+        const response = await fetch('/analyze', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({tweet, backend})
+        });
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        const data = await response.json();
+        console.log("Received data:", data);
+        displayResults(data);
+    } catch (error) {
+        console.error("Error:", error);
+        results.innerHTML = `<p>Error: ${error.message}</p>`;
+    }
+});
+
+pasteBtn.addEventListener('click', async () => {
+    try {
+        const text = await navigator.clipboard.readText();
+        document.getElementById('tweet-input').value = text;
+    } catch (err) {
+        console.error('Failed to read clipboard contents: ', err);
+    }
+});
+
+function displayResults(data) {
+    if (data.error) {
+        results.innerHTML = `<p>Error: ${data.error}</p>`;
+        return;
+    }
+    results.style.display = 'flex';
+    results.innerHTML = `
+        <div class="col-md-6 mb-4">
+            <div class="dashboard-card">
+                <div class="card-header">
+                    <i class="fas fa-chart-pie"></i> AWS Sentiment
+                </div>
+                <div class="card-body">
+                    <h2 class="text-center">${data.aws_sentiment ?? 'N/A'}</h2>
+                </div>
+            </div>
+        </div>
+        <div class="col-md-6 mb-4">
+            <div class="dashboard-card">
+                <div class="card-header">
+                    <i class="fas fa-comment-dots"></i> TextBlob Sentiment
+                </div>
+                <div class="card-body">
+                    <h2 class="text-center">${data.textblob_sentiment}</h2>
+                </div>
+            </div>
+        </div>
+        <div class="col-md-6 mb-4">
+            <div class="dashboard-card">
+                <div class="card-header">
+                    <i class="fas fa-chart-bar"></i> AWS Sentiment Scores
+                </div>
+                <div class="card-body">
+                    <canvas id="aws-sentiment-chart"></canvas>
+                </div>
+            </div>
+        </div>
+        <div class="col-md-6 mb-4">
+            <div class="dashboard-card">
+                <div class="card-header">
+                    <i class="fas fa-balance-scale"></i> Sentiment Comparison
+                </div>
+                <div class="card-body">
+                    <canvas id="sentiment-comparison-chart"></canvas>
+                </div>
+            </div>
+        </div>
+        <div class="col-md-6 mb-4">
+            <div class="dashboard-card">
+                <div class="card-header">
+                    <i class="fas fa-key"></i> Key Phrases
+                </div>
+                <div class="card-body scroll-box">
+                    <ul class="list-group list-group-flush" id="key-phrases-list">
+                        ${(data.key_phrases || []).map(phrase => `<li class="list-group-item">${phrase}</li>`).join('')}
+                    </ul>
+                </div>
+            </div>
+        </div>
+        <div class="col-md-6 mb-4">
+            <div class="dashboard-card">
+                <div class="card-header">
+                    <i class="fas fa-tags"></i> Entities
+                </div>
+                <div class="card-body scroll-box">
+                    <ul class="list-group list-group-flush" id="entities-list">
+                        ${(data.entities || []).map(entity => `<li class="list-group-item">${entity.Text} (${entity.Type})</li>`).join('')}
+                    </ul>
+                </div>
+            </div>
+        </div>
+        <div class="col-md-6 mb-4">
+            <div class="dashboard-card">
+                <div class="card-header">
+                    <i class="fas fa-info-circle"></i> Text Stats
+                </div>
+                <div class="card-body">
+                    <div class="row">
+                        <div class="col-6">
+                            <h4 class="text-center">${data.word_count}</h4>
+                            <p class="text-center">Words</p>
+                        </div>
+                        <div class="col-6">
+                            <h4 class="text-center">${data.char_count}</h4>
+                            <p class="text-center">Characters</p>
+                        </div>
+                    </div>
+                </div>
+            </div>
+        </div>
+    `;
+    updateCharts(data);
+    animateResults();
+}
+
+function updateCharts(data) {
+    // Local-only results carry no Comprehend scores
+    const scores = data.aws_scores || {Positive: 0, Negative: 0, Neutral: 0, Mixed: 0};
+    updateSentimentChart(scores);
+    updateSentimentComparisonChart({...data, aws_scores: scores});
+}
+
+function updateSentimentChart(scores) {
+    const ctx = document.getElementById('aws-sentiment-chart').getContext('2d');
+    if (charts.sentiment) charts.sentiment.destroy();
+    charts.sentiment = new Chart(ctx, {
+        type: 'bar',
+        data: {
+            labels: Object.keys(scores),
+            datasets: [{
+                label: 'AWS Sentiment Scores',
+                data: Object.values(scores),
+                borderColor: [
+                    'rgba(75, 192, 192, 1)',
+                    'rgba(255, 99, 132, 1)',
+                    'rgba(54, 162, 235, 1)',
+                    'rgba(255, 206, 86, 1)'
+                ],
+                borderWidth: 1
+            }]
+        },
+        options: {
+            scales: {
+                y: {
+                    beginAtZero: true
+                }
+            },
+            animation: {
+                duration: 1500,
+                easing: 'easeOutQuart'
+            }
+        }
+    });
+}
+
+function updateSentimentComparisonChart(data) {
+    const ctx = document.getElementById('sentiment-comparison-chart').getContext('2d');
+    if (charts.comparison) charts.comparison.destroy();
+    charts.comparison = new Chart(ctx, {
+        type: 'radar',
+        data: {
+            labels: ['Positive', 'Negative', 'Neutral', 'Mixed'],
+            datasets: [{
+                label: 'AWS',
+                data: [
+                    data.aws_scores.Positive,
+                    data.aws_scores.Negative,
+                    data.aws_scores.Neutral,
+                    data.aws_scores.Mixed
+                ],
+                backgroundColor: 'rgba(75, 192, 192, 0.2)',
+                borderColor: 'rgba(75, 192, 192, 1)',
+                pointBackgroundColor: 'rgba(75, 192, 192, 1)',
+                pointBorderColor: '#fff',
+                pointHoverBackgroundColor: '#fff',
+                pointHoverBorderColor: 'rgba(75, 192, 192, 1)'
+            }, {
+                label: 'TextBlob',
+                data: [
+                    data.textblob_sentiment === 'POSITIVE' ? 1 : 0,
+                    data.textblob_sentiment === 'NEGATIVE' ? 1 : 0,
+                    data.textblob_sentiment === 'NEUTRAL' ? 1 : 0,
+                    0 // TextBlob doesn't have a 'Mixed' category
+                ],
+                backgroundColor: 'rgba(255, 99, 132, 0.2)',
+                borderColor: 'rgba(255, 99, 132, 1)',
+                pointBackgroundColor: 'rgba(255, 99, 132, 1)',
+                pointBorderColor: '#fff',
+                pointHoverBackgroundColor: '#fff',
+                pointHoverBorderColor: 'rgba(255, 99, 132, 1)'
+            }]
+        },
+        options: {
+            elements: {
+                line: {
+                    borderWidth: 3
+                }
+            },
+            animation: {
+                duration: 1500,
+                easing: 'easeOutQuart'
+            }
+        }
+    });
+}
+
+function animateResults() {
+    // Web Animations API stagger, so the dashboard needs no animation library
+    const stagger = (selector, keyframes, step) => document.querySelectorAll(selector).forEach((element, i) =>
+        element.animate(keyframes, {duration: 1000, delay: i * step, easing: 'cubic-bezier(0.22, 1, 0.36, 1)', fill: 'backwards'}));
+    stagger('.dashboard-card', [{opacity: 0, transform: 'translateY(50px)'}, {opacity: 1, transform: 'none'}], 100);
+    stagger('#key-phrases-list li, #entities-list li', [{opacity: 0, transform: 'translateX(50px)'}, {opacity: 1, transform: 'none'}], 50);
+}
+
+// Add real-time character count
+const tweetInput = document.getElementById('tweet-input');
+const charCount = document.createElement('div');
+charCount.classList.add('text-muted', 'mt-2');
+tweetInput.parentNode.insertBefore(charCount, tweetInput.nextSibling);
+
+tweetInput.addEventListener('input', function() {
+    charCount.textContent = `${this.value.length} characters`;
+});
+
+// Add a feature to save analysis results
+const saveButton = document.createElement('button');
+saveButton.textContent = 'Save Analysis';
+saveButton.classList.add('btn', 'btn-success', 'mt-3');
+saveButton.style.display = 'none';
+form.appendChild(saveButton);
+
+saveButton.addEventListener('click', function() {
+    const results = document.getElementById('results').innerHTML;
+    const blob = new Blob([results], {type: 'text/html'});
+    const a = document.createElement('a');
+    a.href = URL.createObjectURL(blob);
+    a.download = 'sentiment_analysis_results.html';
+    a.click();
+});
+
+// Show save button after analysis
+form.addEventListener('submit', function() {
+    saveButton.style.display = 'inline-block';
+});
+
+// Add a theme toggle feature
+const themeToggle = document.createElement('button');
+themeToggle.textContent = 'Toggle Dark Mode';
+themeToggle.classList.add('btn', 'btn-outline-secondary', 'mt-3', 'ms-3');
+form.appendChild(themeToggle);
+
+themeToggle.addEventListener('click', function() {
+    document.body.classList.toggle('dark-mode');
+    updateChartsTheme();
+});
+
+function updateChartsTheme() {
+    const isDarkMode = document.body.classList.contains('dark-mode');
+    const textColor = isDarkMode ? '#ffffff' : '#000000';
+
+    Object.values(charts).forEach(chart => {
+        chart.options.plugins.legend.labels.color = textColor;
+        chart.options.scales.x.ticks.color = textColor;
+        chart.options.scales.y.ticks.color = textColor;
+        chart.update();
+    });
+}
+
+
+// Stream CSV results into the page as each row is analyzed
+function escapeHtml(value) {
+    const div = document.createElement('div');
+    div.textContent = value ?? '';
+    return div.innerHTML;
+}
+
+function renderStreamShell() {
+    results.style.display = 'block';
+    results.innerHTML = `
+        <div class="col-12 mb-4">
+            <div class="dashboard-card">
+                <div class="card-header">
+                    <i class="fas fa-stream"></i> CSV Analysis
+                    <span id="stream-status" class="float-end">Analyzing...</span>
+                </div>
+                <div class="card-body">
+                    <div id="stream-counts" class="mb-3"></div>
+                    <div id="stream-table" class="table-responsive" style="max-height: 500px; overflow-y: auto;">
+                        <table class="table table-striped table-sm">
+                            <thead>
+                                <tr><th>#</th><th>Text</th><th>AWS</th><th>TextBlob</th><th>Words</th></tr>
+                            </thead>
+                            <tbody id="stream-rows"></tbody>
+                        </table>
+                    </div>
+                </div>
+            </div>
+        </div>
+    `;
+}
+
+function renderStreamCounts(counts) {
+    document.getElementById('stream-counts').innerHTML = Object.entries(counts)
+        .map(([sentiment, count]) => `<span class="badge bg-secondary me-2">${escapeHtml(sentiment)}: ${count}</span>`)
+        .join('');
+}
+
+function appendStreamRow(index, result) {
+    const row = document.createElement('tr');
+    if (result.error) {
+        row.innerHTML = `<td>${index}</td><td colspan="4" class="text-danger">${escapeHtml(result.error)}</td>`;
+    } else {
+        row.innerHTML = `<td>${index}</td><td>${escapeHtml(result.text)}</td>` +
+            `<td>${escapeHtml(result.aws_sentiment ?? 'N/A')}</td>` +
+            `<td>${escapeHtml(result.textblob_sentiment)}</td><td>${result.word_count}</td>`;
+    }
+    const rows = document.getElementById('stream-rows');
+    rows.appendChild(row);
+    // Only the latest rows are kept while streaming; the full set is paged in when done
+    if (rows.children.length > 200) rows.removeChild(rows.firstChild);
+}
+
+function handleStreamEvent(name, payload) {
+    if (name === 'row') {
+        appendStreamRow(payload.index, payload.result);
+        renderStreamCounts(payload.counts);
+    } else if (name === 'done') {
+        renderStreamCounts(payload.counts);
+        document.getElementById('stream-status').innerHTML =
+            `Done: ${payload.rows} rows <a class="text-white ms-2" href="/jobs/${payload.job_id}/result">Download CSV</a>`;
+        const table = document.getElementById('stream-table');
+        table.removeAttribute('style');
+        createResultsTable(table, payload.job_id);
+        const charts = document.createElement('div');
+        charts.className = 'col-12';
+        results.appendChild(charts);
+        createResultCharts(charts, payload.job_id);
+    }
+}
+
+document.getElementById('csv-form').addEventListener('submit', async (e) => {
+    e.preventDefault();
+    const formData = new FormData(e.target);
+    try {
+        const response = await fetch('/analyze/stream', {
+            method: 'POST',
+            body: formData
+        });
+        if (!response.ok) {
+            const data = await response.json().catch(() => ({}));
+            throw new Error(data.error || `HTTP error! status: ${response.status}`);
+        }
+        renderStreamShell();
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+            const {value, done} = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, {stream: true});
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const frame = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                let name = 'message';
+                let data = '';
+                frame.split('\n').forEach(line => {
+                    if (line.startsWith('event: ')) name = line.slice(7);
+                    else if (line.startsWith('data: ')) data += line.slice(6);
+                });
+                if (data) handleStreamEvent(name, JSON.parse(data));
+            }
+        }
+    } catch (error) {
+        console.error("Error:", error);
+        results.innerHTML = `<p>Error: ${escapeHtml(error.message)}</p>`;
+        results.style.display = 'block';
+    }
+});
@@ -0,0 +1,105 @@
+// Draws the CSV result charts from /jobs/<id>/aggregates, so the server only sends a few numbers
+function createResultCharts(container, jobId) {
+    const palette = ['#4a90e2', '#e74c3c', '#95a5a6', '#f1c40f', '#2ecc71', '#9b59b6'];
+    const card = (id, title) => `
+        <div class="col-md-6 mb-4">
+            <div class="dashboard-card">
+                <div class="card-header">${title}</div>
+                <div class="card-body"><canvas id="${id}"></canvas></div>
+            </div>
+        </div>`;
+    container.innerHTML = `<div class="row">
+        ${card('chart-sentiment-distribution', 'AWS Sentiment Distribution')}
+        ${card('chart-sentiment-comparison', 'TextBlob vs AWS Sentiment Comparison')}
+        ${card('chart-sentiment-scores', 'Distribution of AWS Sentiment Scores')}
+        ${card('chart-top-key-phrases', 'Top Key Phrases')}
+        ${card('chart-sentiment-by-length', 'Sentiment Distribution by Text Length')}
+    </div>`;
+    const charts = [];
+    const draw = (id, config) => charts.push(new Chart(document.getElementById(id), config));
+    const hide = (id) => document.getElementById(id).closest('.col-md-6').remove();
+
+    function stacked(labels, series) {
+        return {
+            type: 'bar',
+            data: {
+                labels,
+                datasets: Object.entries(series).map(([label, data], i) => ({label, data, backgroundColor: palette[i % palette.length]}))
+            },
+            options: {scales: {x: {stacked: true}, y: {stacked: true, beginAtZero: true}}}
+        };
+    }
+
+    async function load() {
+        const response = await fetch(`/jobs/${jobId}/aggregates`);
+        const data = await response.json();
+        if (!response.ok) {
+            container.textContent = data.error || `HTTP error! status: ${response.status}`;
+            return;
+        }
+
+        const counts = data.sentiment_counts;
+        if (Object.keys(counts).length) {
+            draw('chart-sentiment-distribution', {
+                type: 'pie',
+                data: {labels: Object.keys(counts), datasets: [{data: Object.values(counts), backgroundColor: palette}]}
+            });
+        } else {
+            hide('chart-sentiment-distribution');
+        }
+
+        const crosstab = data.crosstab;
+        if (crosstab.textblob_sentiment.length) {
+            const series = {};
+            crosstab.aws_sentiment.forEach((aws, column) => {
+                series[aws] = crosstab.counts.map(row => row[column]);
+            });
+            draw('chart-sentiment-comparison', stacked(crosstab.textblob_sentiment, series));
+        } else {
+            hide('chart-sentiment-comparison');
+        }
+
+        // Box plot from precomputed quartiles: a thin floating bar for the whiskers, a wide one for the
+        // interquartile range and a point for the median
+        if (data.scores.length) {
+            const labels = data.scores.map(stats => stats.label);
+            draw('chart-sentiment-scores', {
+                type: 'bar',
+                data: {
+                    labels,
+                    datasets: [
+                        {label: 'Whiskers', data: data.scores.map(stats => [stats.whislo, stats.whishi]), backgroundColor: '#34495e', barPercentage: 0.05, grouped: false},
+                        {label: 'Q1-Q3', data: data.scores.map(stats => [stats.q1, stats.q3]), backgroundColor: 'rgba(74, 144, 226, 0.6)', barPercentage: 0.5, grouped: false},
+                        {type: 'line', label: 'Median', data: data.scores.map(stats => stats.med), showLine: false, pointStyle: 'line', pointRadius: 20, borderColor: '#e67e22', borderWidth: 3}
+                    ]
+                },
+                options: {scales: {y: {min: 0, max: 1}}}
+            });
+        } else {
+            hide('chart-sentiment-scores');
+        }
+
+        if (data.top_phrases.length) {
+            draw('chart-top-key-phrases', {
+                type: 'bar',
+                data: {
+                    labels: data.top_phrases.map(([phrase]) => phrase),
+                    datasets: [{label: 'Count', data: data.top_phrases.map(([, count]) => count), backgroundColor: palette[0]}]
+                },
+                options: {indexAxis: 'y'}
+            });
+        } else {
+            hide('chart-top-key-phrases');
+        }
+
+        const lengths = data.length_distribution;
+        if (lengths.bins.length) {
+            draw('chart-sentiment-by-length', stacked(lengths.bins, lengths.shares));
+        } else {
+            hide('chart-sentiment-by-length');
+        }
+    }
+
+    load();
+    return charts;
+}
@@ -0,0 +1,84 @@
+function createResultsTable(container, jobId) {
+    const state = {page: 1, sort: 'index', order: 'asc', sentiment: '', entity_type: '', q: ''};
+    const escape = (value) => {
+        const div = document.createElement('div');
+        div.textContent = value ?? '';
+        return div.innerHTML;
+    };
+    const columns = [
+        ['index', '#'], ['text', 'Text'], ['aws_sentiment', 'AWS'], ['textblob_sentiment', 'TextBlob'],
+        ['Positive', 'Positive'], ['Negative', 'Negative'], ['word_count', 'Words']
+    ];
+    container.innerHTML = `
+        <div class="row g-2 mb-3">
+            <div class="col-md-3">
+                <select class="form-select" data-filter="sentiment">
+                    <option value="">All sentiments</option>
+                    <option>POSITIVE</option><option>NEGATIVE</option><option>NEUTRAL</option><option>MIXED</option>
+                </select>
+            </div>
+            <div class="col-md-3"><select class="form-select" data-filter="entity_type"><option value="">All entity types</option></select></div>
+            <div class="col-md-6"><input type="search" class="form-control" data-filter="q" placeholder="Search text"></div>
+        </div>
+        <div class="table-responsive">
+            <table class="table table-striped table-sm">
+                <thead><tr>${columns.map(([key, label]) => `<th role="button" data-sort="${key}">${label}</th>`).join('')}<th>Key Phrases</th><th>Entities</th></tr></thead>
+                <tbody></tbody>
+            </table>
+        </div>
+        <div class="d-flex justify-content-between align-items-center">
+            <button class="btn btn-outline-secondary btn-sm" data-page="-1">Previous</button>
+            <span data-role="summary"></span>
+            <button class="btn btn-outline-secondary btn-sm" data-page="1">Next</button>
+        </div>
+    `;
+    const body = container.querySelector('tbody');
+    const summary = container.querySelector('[data-role="summary"]');
+    const entitySelect = container.querySelector('[data-filter="entity_type"]');
+    let pages = 1;
+    let searchTimer = null;
+
+    async function load() {
+        const params = new URLSearchParams({page: state.page, per_page: 50, sort: state.sort, order: state.order});
+        ['sentiment', 'entity_type', 'q'].forEach(key => { if (state[key]) params.set(key, state[key]); });
+        const response = await fetch(`/jobs/${jobId}/rows?${params}`);
+        const data = await response.json();
+        if (!response.ok) {
+            summary.textContent = data.error || `HTTP error! status: ${response.status}`;
+            return;
+        }
+        pages = Math.max(1, data.pages);
+        if (entitySelect.options.length === 1) {
+            data.entity_types.forEach(type => entitySelect.add(new Option(type, type)));
+        }
+        body.innerHTML = data.rows.map(row => row.error
+            ? `<tr><td>${row.index}</td><td colspan="8" class="text-danger">${escape(row.error)}</td></tr>`
+            : `<tr><td>${row.index}</td><td>${escape(row.text)}</td><td>${escape(row.aws_sentiment ?? 'N/A')}</td>` +
+              `<td>${escape(row.textblob_sentiment)}</td>` +
+              `<td>${row.aws_scores ? row.aws_scores.Positive.toFixed(3) : ''}</td>` +
+              `<td>${row.aws_scores ? row.aws_scores.Negative.toFixed(3) : ''}</td><td>${row.word_count}</td>` +
+              `<td>${escape((row.key_phrases || []).join(', '))}</td>` +
+              `<td>${escape((row.entities || []).map(entity => `${entity.Text} (${entity.Type})`).join(', '))}</td></tr>`
+        ).join('');
+        summary.textContent = `Page ${data.page} of ${pages} (${data.matching_rows} of ${data.total_rows} rows)`;
+    }
+
+    container.querySelectorAll('[data-sort]').forEach(header => header.addEventListener('click', () => {
+        const key = header.dataset.sort;
+        state.order = state.sort === key && state.order === 'asc' ? 'desc' : 'asc';
+        state.sort = key;
+        state.page = 1;
+        load();
+    }));
+    container.querySelectorAll('[data-filter]').forEach(input => input.addEventListener('input', () => {
+        state[input.dataset.filter] = input.value;
+        state.page = 1;
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(load, 250);
+    }));
+    container.querySelectorAll('[data-page]').forEach(button => button.addEventListener('click', () => {
+        state.page = Math.min(pages, Math.max(1, state.page + Number(button.dataset.page)));
+        load();
+    }));
+    load();
+}
@@ -0,0 +1,112 @@
+from flask import request, url_for
+from functools import lru_cache
+from werkzeug.security import safe_join
+import gzip
+import hashlib
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Versioned asset URLs change whenever the file does, so browsers may keep them for a year
+STATIC_MAX_AGE = 365 * 24 * 3600
+# Bodies smaller than this are not worth the compression overhead
+MIN_COMPRESS_SIZE = 500
+COMPRESSIBLE_MIMETYPES = {'text/html', 'text/css', 'text/csv', 'text/plain', 'application/javascript',
+                          'text/javascript', 'application/json', 'image/svg+xml', 'font/ttf'}
+# Dynamic responses favour speed; static files are compressed once and cached, so they get the best ratio
+DYNAMIC_LEVELS = {'br': 4, 'gzip': 6}
+STATIC_LEVELS = {'br': 11, 'gzip': 9}
+
+def compress(data, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+def choose_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+@lru_cache(maxsize=256)
+def _file_version(path, mtime_ns):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+@lru_cache(maxsize=256)
+def _compressed_file(path, mtime_ns, encoding):
+    with open(path, 'rb') as f:
+        return compress(f.read(), encoding, STATIC_LEVELS[encoding])
+
+def _static_path(app, filename):
+    path = safe_join(app.static_folder, filename)
+    if path is None or not os.path.isfile(path):
+        return None
+    return path
+
+def asset_url(app, filename):
+    # Content hash in the query string: a changed file gets a new URL instead of a stale cached copy
+    path = _static_path(app, filename)
+    if path is None:
+        return url_for('static', filename=filename)
+    return url_for('static', filename=filename, v=_file_version(path, os.stat(path).st_mtime_ns))
+
+def _mark_encoded(response, encoding, body):
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    # The ETag names the uncompressed content, so it becomes weak for the encoded variant
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+def finalize_response(app, response):
+    response.vary.add('Accept-Encoding')
+    is_static = request.endpoint == 'static'
+    # vendor/ paths carry the library version, so files they reference (e.g. fonts) are immutable too
+    if is_static and (request.args.get('v') or request.view_args['filename'].startswith('vendor/')):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = STATIC_MAX_AGE
+        response.cache_control.immutable = True
+    if response.status_code != 200 or 'Content-Encoding' in response.headers:
+        return response
+
+    if is_static:
+        encoding = choose_encoding()
+        path = _static_path(app, request.view_args['filename'])
+        if encoding is None or path is None or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+        stat = os.stat(path)
+        if stat.st_size < MIN_COMPRESS_SIZE:
+            return response
+        body = _compressed_file(path, stat.st_mtime_ns, encoding)
+        # The file handle send_file opened is replaced by the cached compressed bytes
+        response.close()
+        response.direct_passthrough = False
+        return _mark_encoded(response, encoding, body)
+
+    # Streamed responses (SSE, NDJSON, CSV exports) are sent as produced and left uncompressed
+    if response.is_streamed:
+        return response
+    if request.method == 'GET':
+        response.add_etag()
+        response.make_conditional(request)
+        if response.status_code != 200:
+            return response
+    encoding = choose_encoding()
+    if encoding is None or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return response
+    return _mark_encoded(response, encoding, compress(data, encoding, DYNAMIC_LEVELS[encoding]))
+
+def init_app(app):
+    app.add_template_global(lambda filename: asset_url(app, filename), 'asset_url')
+    app.after_request(lambda response: finalize_response(app, response))
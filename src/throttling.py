@@ -0,0 +1,75 @@
+from src.metrics import METRICS
+import random
+import threading
+import time
+
+THROTTLING_ERRORS = {
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'RequestLimitExceeded',
+    'ProvisionedThroughputExceededException',
+}
+# Server-side failures that usually succeed on another attempt
+TRANSIENT_ERRORS = {
+    'InternalServerException',
+    'InternalFailure',
+    'ServiceUnavailable',
+    'ServiceUnavailableException',
+    'RequestTimeout',
+    'RequestTimeoutException',
+}
+
+class RateLimiter:
+    def __init__(self, requests_per_second):
+        if requests_per_second <= 0:
+            raise ValueError("requests_per_second must be positive")
+        self.interval = 1.0 / requests_per_second
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
+
+    def acquire(self):
+        # Each caller reserves the next free slot, so concurrent workers are spread
+        # evenly instead of bursting together
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            METRICS.observe('rate_limit_wait', slot - now)
+            time.sleep(slot - now)
+
+def is_throttling_error(error):
+    # botocore is only loaded once an error needs classifying
+    from botocore.exceptions import ClientError
+    return isinstance(error, ClientError) and error.response.get('Error', {}).get('Code') in THROTTLING_ERRORS
+
+def is_transient_error(error):
+    from botocore.exceptions import ClientError, ConnectionError, HTTPClientError
+    if isinstance(error, (ConnectionError, HTTPClientError)):
+        return True
+    return isinstance(error, ClientError) and (
+        error.response.get('Error', {}).get('Code') in TRANSIENT_ERRORS
+        or error.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0) >= 500)
+
+def call_with_backoff(func, rate_limiter=None, max_retries=5, base_delay=0.5, max_delay=20.0):
+    # Retries throttling and transient errors itself, so every attempt waits for the rate limiter;
+    # the shared Comprehend client is built with total_max_attempts=1 for that reason
+    for attempt in range(max_retries + 1):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        try:
+            response = func()
+        except Exception as e:
+            throttled = is_throttling_error(e)
+            if throttled:
+                METRICS.count('throttled_calls')
+            if attempt == max_retries or not (throttled or is_transient_error(e)):
+                raise
+            METRICS.count('backoff_retries')
+            # Exponential backoff with full jitter
+            time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
+            continue
+        # Retries botocore made itself (only when total_max_attempts was raised above 1), reported in the response metadata
+        if isinstance(response, dict):
+            METRICS.count('sdk_retries', response.get('ResponseMetadata', {}).get('RetryAttempts', 0))
+        return response
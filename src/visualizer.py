@@ -1,87 +1,189 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pandas as pd
-from collections import Counter
+from src.aggregates import ResultAggregates
+from src.metrics import METRICS
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+import functools
+import hashlib
+import json
 import os
+import pickle
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+PLOT_FORMATS = ('png', 'svg', 'webp')
+DEFAULT_DPI = 100
+# Bump when a renderer changes so cached images are redrawn
+RENDER_VERSION = '2'
+CACHE_MANIFEST = '.visualizations.json'
+
 def safe_plot(plot_func):
+    @functools.wraps(plot_func)
     def wrapper(*args, **kwargs):
         try:
-            plot_func(*args, **kwargs)
+            return plot_func(*args, **kwargs)
         except Exception as e:
             logging.error(f"Error in {plot_func.__name__}: {str(e)}")
     return wrapper
 
-@safe_plot
-def plot_sentiment_distribution(df, output_path):
-    plt.figure(figsize=(10, 6))
-    df['aws_sentiment'].value_counts().plot(kind='pie', autopct='%1.1f%%')
-    plt.title('AWS Sentiment Distribution')
-    plt.savefig(f'{output_path}/sentiment_distribution.png')
-    plt.close()
-    logging.info(f"Sentiment distribution plot saved to {output_path}/sentiment_distribution.png")
+# Each plot is split in two: a summary read from the one-pass ResultAggregates (a few numbers that
+# are cheap to hash and to send to a worker process), and a renderer that draws them on its own
+# Figure, so plots can be drawn concurrently without pyplot's global state. A summary of None means
+# the results have no data for that plot
 
-@safe_plot
-def plot_sentiment_comparison(df, output_path):
-    plt.figure(figsize=(10, 6))
-    df.groupby(['textblob_sentiment', 'aws_sentiment']).size().unstack().plot(kind='bar', stacked=True)
-    plt.title('TextBlob vs AWS Sentiment Comparison')
-    plt.xlabel('TextBlob Sentiment')
-    plt.ylabel('Count')
-    plt.legend(title='AWS Sentiment')
-    plt.savefig(f'{output_path}/sentiment_comparison.png')
-    plt.close()
-    logging.info(f"Sentiment comparison plot saved to {output_path}/sentiment_comparison.png")
+def _stacked_bars(ax, table):
+    positions = np.arange(len(table.index))
+    bottom = np.zeros(len(table.index))
+    for column in table.columns:
+        values = table[column].fillna(0).to_numpy(dtype=float)
+        ax.bar(positions, values, bottom=bottom, label=str(column))
+        bottom += values
+    ax.set_xticks(positions, [str(label) for label in table.index], rotation=90)
 
-@safe_plot
-def plot_sentiment_scores(df, output_path):
-    scores = pd.DataFrame(df['aws_scores'].tolist(), index=df.index)
-    plt.figure(figsize=(10, 6))
-    scores.boxplot()
-    plt.title('Distribution of AWS Sentiment Scores')
-    plt.savefig(f'{output_path}/sentiment_scores.png')
-    plt.close()
-    logging.info(f"Sentiment scores plot saved to {output_path}/sentiment_scores.png")
+def summarize_sentiment_distribution(aggregates):
+    counts = aggregates.sentiment_counts()
+    return None if counts.empty else counts
 
-@safe_plot
-def plot_top_key_phrases(df, output_path):
-    all_phrases = [phrase for phrases in df['key_phrases'] for phrase in phrases]
-    top_phrases = Counter(all_phrases).most_common(20)
-    
-    plt.figure(figsize=(12, 8))
-    plt.barh([phrase[0] for phrase in reversed(top_phrases)], [phrase[1] for phrase in reversed(top_phrases)])
-    plt.title('Top 20 Key Phrases')
-    plt.xlabel('Count')
-    plt.savefig(f'{output_path}/top_key_phrases.png')
-    plt.close()
-    logging.info(f"Top key phrases plot saved to {output_path}/top_key_phrases.png")
+def render_sentiment_distribution(counts, fig):
+    ax = fig.subplots()
+    ax.pie(counts.to_numpy(), labels=counts.index.tolist(), autopct='%1.1f%%')
+    ax.set_ylabel('count')
+    ax.set_title('AWS Sentiment Distribution')
+
+def summarize_sentiment_comparison(aggregates):
+    table = aggregates.crosstab()
+    return None if table.empty else table
+
+def render_sentiment_comparison(table, fig):
+    ax = fig.subplots()
+    _stacked_bars(ax, table)
+    ax.set_title('TextBlob vs AWS Sentiment Comparison')
+    ax.set_xlabel('TextBlob Sentiment')
+    ax.set_ylabel('Count')
+    ax.legend(title='AWS Sentiment')
+
+def summarize_sentiment_scores(aggregates):
+    return aggregates.score_box_stats() or None
+
+def render_sentiment_scores(box_stats, fig):
+    ax = fig.subplots()
+    ax.bxp(box_stats)
+    ax.grid(True)
+    ax.set_title('Distribution of AWS Sentiment Scores')
+
+def summarize_top_key_phrases(aggregates):
+    return aggregates.top_phrases(20) or None
+
+def render_top_key_phrases(top_phrases, fig):
+    ax = fig.subplots()
+    ax.barh([phrase[0] for phrase in reversed(top_phrases)], [phrase[1] for phrase in reversed(top_phrases)])
+    ax.set_title('Top 20 Key Phrases')
+    ax.set_xlabel('Count')
+
+def summarize_sentiment_by_length(aggregates):
+    table = aggregates.length_distribution(bins=5)
+    return None if table.empty else table
+
+def render_sentiment_by_length(length_sentiment, fig):
+    ax = fig.subplots()
+    _stacked_bars(ax, length_sentiment)
+    ax.set_title('Sentiment Distribution by Text Length')
+    ax.set_xlabel('Text Length')
+    ax.set_ylabel('Proportion')
+    ax.legend(title='AWS Sentiment')
+
+# name -> (summary, renderer, figure size)
+PLOTS = {
+    'sentiment_distribution': (summarize_sentiment_distribution, render_sentiment_distribution, (10, 6)),
+    'sentiment_comparison': (summarize_sentiment_comparison, render_sentiment_comparison, (10, 6)),
+    'sentiment_scores': (summarize_sentiment_scores, render_sentiment_scores, (10, 6)),
+    'top_key_phrases': (summarize_top_key_phrases, render_top_key_phrases, (12, 8)),
+    'sentiment_by_length': (summarize_sentiment_by_length, render_sentiment_by_length, (12, 6)),
+}
+
+def parse_plots(value):
+    # Accepts a comma-separated string or an iterable of plot names; returns them in PLOTS order
+    names = value.split(',') if isinstance(value, str) else list(value)
+    names = {name.strip() for name in names if name.strip()}
+    unknown = names - set(PLOTS)
+    if unknown:
+        raise ValueError(f"Unknown plot(s): {', '.join(sorted(unknown))}. Choose from: {', '.join(PLOTS)}")
+    if not names:
+        raise ValueError("At least one plot must be selected")
+    return tuple(name for name in PLOTS if name in names)
 
 @safe_plot
-def plot_sentiment_by_length(df, output_path):
-    df['text_length'] = df['text'].str.len()
-    length_sentiment = df.groupby(pd.cut(df['text_length'], bins=5))['aws_sentiment'].value_counts(normalize=True).unstack()
-    
-    plt.figure(figsize=(12, 6))
-    length_sentiment.plot(kind='bar', stacked=True)
-    plt.title('Sentiment Distribution by Text Length')
-    plt.xlabel('Text Length')
-    plt.ylabel('Proportion')
-    plt.legend(title='AWS Sentiment')
-    plt.savefig(f'{output_path}/sentiment_by_length.png')
-    plt.close()
-    logging.info(f"Sentiment by length plot saved to {output_path}/sentiment_by_length.png")
-
-def generate_visualizations(df, output_path):
+def render_plot(name, summary, path, fmt, dpi):
+    # Runs in a worker process: a standalone Figure renders through Agg without touching pyplot.
+    # matplotlib is imported here, so it is only loaded when something is actually drawn
+    from matplotlib.figure import Figure
+    _, renderer, figsize = PLOTS[name]
+    fig = Figure(figsize=figsize, dpi=dpi)
+    renderer(summary, fig)
+    fig.savefig(path, format=fmt, dpi=dpi, bbox_inches='tight')
+    return path
+
+def plot_key(name, summary, fmt, dpi):
+    digest = hashlib.sha256(pickle.dumps((RENDER_VERSION, name, fmt, dpi, summary), protocol=4))
+    return digest.hexdigest()
+
+def _load_manifest(output_path):
+    try:
+        with open(os.path.join(output_path, CACHE_MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_manifest(output_path, manifest):
+    with open(os.path.join(output_path, CACHE_MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+def generate_visualizations(results, output_path, plots=tuple(PLOTS), fmt='png', dpi=DEFAULT_DPI, workers=None):
+    # results is a DataFrame or ResultBatch of analysis results, or a ResultAggregates already filled chunk by chunk
+    with METRICS.time('visualization'):
+        _generate_visualizations(results, output_path, plots, fmt, dpi, workers)
+
+def _generate_visualizations(results, output_path, plots, fmt, dpi, workers):
+    if fmt not in PLOT_FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'. Choose from: {', '.join(PLOT_FORMATS)}")
     os.makedirs(output_path, exist_ok=True)
     logging.info(f"Generating visualizations in {output_path}")
 
-    plot_sentiment_distribution(df, output_path)
-    plot_sentiment_comparison(df, output_path)
-    plot_sentiment_scores(df, output_path)
-    plot_top_key_phrases(df, output_path)
-    plot_sentiment_by_length(df, output_path)
+    aggregates = results
+    if not isinstance(results, ResultAggregates):
+        aggregates = ResultAggregates()
+        aggregates.update(results)
+
+    manifest = _load_manifest(output_path)
+    tasks = []
+    for name in plots:
+        summary_func, _, _ = PLOTS[name]
+        summary = safe_plot(summary_func)(aggregates)
+        if summary is None:
+            logging.info(f"Skipping {name}: no data for this plot")
+            continue
+        filename = f'{name}.{fmt}'
+        path = os.path.join(output_path, filename)
+        key = plot_key(name, summary, fmt, dpi)
+        # Identical summaries draw identical images, so an unchanged dataset is not re-rendered
+        if manifest.get(filename) == key and os.path.exists(path):
+            logging.info(f"{name} is unchanged, keeping {path}")
+            continue
+        manifest.pop(filename, None)
+        tasks.append((name, summary, path, key))
+
+    workers = min(len(tasks), workers or os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [(task, executor.submit(render_plot, task[0], task[1], task[2], fmt, dpi)) for task in tasks]
+            rendered = [(task, future.result()) for task, future in futures]
+    else:
+        rendered = [(task, render_plot(task[0], task[1], task[2], fmt, dpi)) for task in tasks]
+
+    for (name, _, path, key), result in rendered:
+        if result is not None:
+            manifest[os.path.basename(path)] = key
+            logging.info(f"{name} plot saved to {path}")
+    _save_manifest(output_path, manifest)
 
-    logging.info("Visualization generation complete")
\ No newline at end of file
+    logging.info("Visualization generation complete")
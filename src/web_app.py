@@ -1,570 +1,380 @@
-from flask import Flask, request, render_template_string, jsonify, send_file
-from src.sentiment_analyzer import analyze_sentiment
+from flask import Flask, Response, g, request, render_template, jsonify, send_file, stream_with_context, url_for
+from src import static_assets
+from src.jobs import JobManager
+from src.metrics import METRICS, PROMETHEUS_CONTENT_TYPE
+from src.pipeline import analyze_texts, dedupe_summary, language_summary
+from src.sentiment_analyzer import AUTO_LANGUAGE, BACKENDS, analyze_sentiment_batch, parse_features, parse_language
+from src.writers import CsvWriter
+from collections import Counter
 import pandas as pd
 import logging
 import io
-import base64
-import matplotlib.pyplot as plt
-import seaborn as sns
+import json
+import time
 
 app = Flask(__name__)
-logging.basicConfig(level=logging.DEBUG)
+# Templates are compiled once and cached by Jinja; static assets are served locally with versioned URLs
+static_assets.init_app(app)
 
+app.config.setdefault('MAX_BATCH_TEXTS', 1000)
+app.config.setdefault('BATCH_WORKERS', 4)
+# Charts are drawn in the browser from /jobs/<id>/aggregates; set to render matplotlib PNGs as well
+app.config.setdefault('SERVER_PLOTS', False)
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+jobs = JobManager()
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_time(response):
+    # Streamed responses are timed to their first byte; the rows they carry are counted by the pipeline
+    started = g.pop('request_started', None)
+    if started is not None:
+        METRICS.observe(f'http.{request.endpoint or "unmatched"}', time.perf_counter() - started)
+    return response
+
+class UploadError(ValueError):
+    pass
+
+def parse_analysis_options(values):
+    backend = values.get('backend') or 'aws'
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}'. Choose one of: {', '.join(BACKENDS)}")
+    return {
+        'backend': backend,
+        'features': parse_features(values.get('features')),
+        'language': parse_language(values.get('language')),
+        'comprehend_detection': str(values.get('comprehend_detection', '')).lower() in ('1', 'true', 'yes', 'on'),
+    }
+
+def read_csv_upload(req):
+    if 'file' not in req.files:
+        raise UploadError('No file part')
+    file = req.files['file']
+    if file.filename == '':
+        raise UploadError('No selected file')
+    if not file.filename.endswith('.csv'):
+        raise UploadError('Please upload a .csv file')
+    with METRICS.time('csv_read') as timer:
+        try:
+            # Try UTF-8 first
+            df = pd.read_csv(file)
+        except UnicodeDecodeError:
+            # If UTF-8 fails, try other encodings
+            try:
+                file.seek(0)  # Reset file pointer
+                df = pd.read_csv(file, encoding='iso-8859-1')
+            except Exception as e:
+                raise UploadError(f"Error reading the CSV file: {str(e)}")
+        timer.rows = len(df)
+
+    start_row = int(req.form.get('start_row') or 0)
+    end_row = int(req.form.get('end_row') or len(df))
+    text_column = req.form.get('text_column', 'text')
+    try:
+        options = parse_analysis_options(req.form)
+    except ValueError as e:
+        raise UploadError(str(e))
+
+    if text_column not in df.columns:
+        raise UploadError(f"Column '{text_column}' not found in the CSV file. Available columns are: {', '.join(df.columns)}")
+
+    texts = df[text_column].iloc[start_row:end_row].tolist()
+    return texts, options
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
     if request.method == 'POST':
-        if 'file' not in request.files:
-            return 'No file part'
-        file = request.files['file']
-        if file.filename == '':
-            return 'No selected file'
-        if file and file.filename.endswith('.csv'):
-            try:
-                # Try UTF-8 first
-                df = pd.read_csv(file)
-            except UnicodeDecodeError:
-                # If UTF-8 fails, try other encodings
-                try:
-                    file.seek(0)  # Reset file pointer
-                    df = pd.read_csv(file, encoding='iso-8859-1')
-                except Exception as e:
-                    return f"Error reading the CSV file: {str(e)}"
-            
-            start_row = int(request.form.get('start_row', 0))
-            end_row = int(request.form.get('end_row', len(df)))
-            text_column = request.form.get('text_column', 'text')
-            
-            if text_column not in df.columns:
-                return f"Column '{text_column}' not found in the CSV file. Available columns are: {', '.join(df.columns)}"
-            
-            df = df.iloc[start_row:end_row]
-            results = []
-            for text in df[text_column]:
-                try:
-                    result = analyze_sentiment(text)
-                    results.append(result)
-                except Exception as e:
-                    app.logger.error(f"Error analyzing text: {text}. Error: {str(e)}")
-                    results.append({"error": str(e)})
-            
-            results_df = pd.DataFrame(results)
-            
-            # Generate visualizations
+        try:
+            texts, options = read_csv_upload(request)
+        except UploadError as e:
+            return str(e)
+
+        stats = Counter()
+        results = analyze_texts(texts, stats=stats, **options)
+        app.logger.info(dedupe_summary(stats))
+        if options['language'] == AUTO_LANGUAGE:
+            app.logger.info(language_summary(stats))
+        for text, result in zip(texts, results):
+            if 'error' in result:
+                app.logger.error(f"Error analyzing text: {text}. Error: {result['error']}")
+
+        visualizations = {}
+        if app.config['SERVER_PLOTS']:
             try:
-                visualizations = generate_visualizations(results_df)
+                visualizations = generate_visualizations(pd.DataFrame(results))
             except Exception as e:
                 app.logger.error(f"Error generating visualizations: {str(e)}")
-                visualizations = {}
-            
-            return render_results(results_df, visualizations)
+
+        # Rows stay on the server and are paged in by the results table
+        job = jobs.add_completed(results, **options)
+        return render_results(job, visualizations)
     
-    return render_template_string(''' 
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>SentiTweet Advanced Dashboard</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0-beta3/css/all.min.css" rel="stylesheet">
-        <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-        <script src="https://cdnjs.cloudflare.com/ajax/libs/animejs/3.2.1/anime.min.js"></script>
-        <style>
-            body { 
-                background-color: #f0f2f5; 
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            }
-            .dashboard-card {
-                background-color: #ffffff;
-                border-radius: 15px;
-                box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-                transition: all 0.3s ease;
-                overflow: hidden;
-            }
-            .dashboard-card:hover { 
-                transform: translateY(-5px);
-                box-shadow: 0 6px 12px rgba(0, 0, 0, 0.15);
-            }
-            .card-header {
-                background-color: #4a90e2;
-                color: white;
-                font-weight: bold;
-                padding: 15px;
-                border-bottom: none;
-            }
-            .card-body {
-                padding: 20px;
-            }
-            .scroll-box {
-                max-height: 200px;
-                overflow-y: auto;
-                scrollbar-width: thin;
-                scrollbar-color: #4a90e2 #f0f2f5;
-            }
-            .scroll-box::-webkit-scrollbar {
-                width: 8px;
-            }
-            .scroll-box::-webkit-scrollbar-track {
-                background: #f0f2f5;
-            }
-            .scroll-box::-webkit-scrollbar-thumb {
-                background-color: #4a90e2;
-                border-radius: 20px;
-            }
-            #tweet-form, #csv-form {
-                background-color: #ffffff;
-                padding: 30px;
-                border-radius: 15px;
-                box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-                margin-bottom: 30px;
-            }
-            .btn-primary {
-                background-color: #4a90e2;
-                border-color: #4a90e2;
-                padding: 10px 20px;
-                font-weight: bold;
-                transition: all 0.3s ease;
-            }
-            .btn-primary:hover {
-                background-color: #3a7ac8;
-                border-color: #3a7ac8;
-                transform: translateY(-2px);
-            }
-            .animate-pop {
-                animation: pop 0.3s ease-in-out;
-            }
-            @keyframes pop {
-                0% { transform: scale(1); }
-                50% { transform: scale(1.05); }
-                100% { transform: scale(1); }
-            }
-            #tweet-input {
-                min-height: 100px;
-                resize: vertical;
-            }
-        </style>
-    </head>
-    <body>
-        <nav class="navbar navbar-dark bg-primary">
-            <div class="container">
-                <span class="navbar-brand mb-0 h1">SentiTweet Advanced Dashboard</span>
-            </div>
-        </nav>
-        <div class="container mt-5">
-            <div class="row justify-content-center">
-                <div class="col-lg-8">
-                    <ul class="nav nav-tabs" id="myTab" role="tablist">
-                        <li class="nav-item" role="presentation">
-                            <button class="nav-link active" id="single-tab" data-bs-toggle="tab" data-bs-target="#single" type="button" role="tab" aria-controls="single" aria-selected="true">Single Text Analysis</button>
-                        </li>
-                        <li class="nav-item" role="presentation">
-                            <button class="nav-link" id="csv-tab" data-bs-toggle="tab" data-bs-target="#csv" type="button" role="tab" aria-controls="csv" aria-selected="false">CSV Analysis</button>
-                        </li>
-                    </ul>
-                    <div class="tab-content" id="myTabContent">
-                        <div class="tab-pane fade show active" id="single" role="tabpanel" aria-labelledby="single-tab">
-                            <form id="tweet-form" class="mb-4">
-                                <div class="mb-3">
-                                    <textarea id="tweet-input" class="form-control" rows="4" placeholder="Enter your text here (no character limit)"></textarea>
-                                    <div id="char-count" class="text-muted mt-2"></div>
-                                </div>
-                                <div class="text-center">
-                                    <button type="submit" class="btn btn-primary me-2">
-                                        <i class="fas fa-search"></i> Analyze
-                                    </button>
-                                    <button type="button" id="paste-btn" class="btn btn-secondary">
-                                        <i class="fas fa-paste"></i> Paste
-                                    </button>
-                                </div>
-                            </form>
-                        </div>
-                        <div class="tab-pane fade" id="csv" role="tabpanel" aria-labelledby="csv-tab">
-                            <form id="csv-form" class="mb-4" enctype="multipart/form-data">
-                                <div class="mb-3">
-                                    <label for="file" class="form-label">Upload CSV file:</label>
-                                    <input type="file" class="form-control" id="file" name="file" accept=".csv" required>
-                                </div>
-                                <div class="mb-3">
-                                    <label for="text_column" class="form-label">Text column name:</label>
-                                    <input type="text" class="form-control" id="text_column" name="text_column" value="text">
-                                </div>
-                                <div class="mb-3">
-                                    <label for="start_row" class="form-label">Start row:</label>
-                                    <input type="number" class="form-control" id="start_row" name="start_row" value="0" min="0">
-                                </div>
-                                <div class="mb-3">
-                                    <label for="end_row" class="form-label">End row:</label>
-                                    <input type="number" class="form-control" id="end_row" name="end_row" min="1">
-                                </div>
-                                <button type="submit" class="btn btn-primary">Analyze CSV</button>
-                            </form>
-                        </div>
-                    </div>
-                </div>
-            </div>
-            <div id="results" class="row" style="display: none;">
-                <!-- Results will be dynamically inserted here -->
-            </div>
-        </div>
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
-        <script>
-            const form = document.getElementById('tweet-form');
-            const results = document.getElementById('results');
-            const pasteBtn = document.getElementById('paste-btn');
-            let charts = {};
-
-            form.addEventListener('submit', async (e) => {
-                e.preventDefault();
-                const tweet = document.getElementById('tweet-input').value;
-                try {
-                    const response = await fetch('/analyze', {
-                        method: 'POST',
-                        headers: {
-                            'Content-Type': 'application/json',
-                        },
-                        body: JSON.stringify({tweet})
-                    });
-                    if (!response.ok) {
-                        throw new Error(`HTTP error! status: ${response.status}`);
-                    }
-                    const data = await response.json();
-                    console.log("Received data:", data);
-                    displayResults(data);
-                } catch (error) {
-                    console.error("Error:", error);
-                    results.innerHTML = `<p>Error: ${error.message}</p>`;
-                }
-            });
-
-            pasteBtn.addEventListener('click', async () => {
-                try {
-                    const text = await navigator.clipboard.readText();
-                    document.getElementById('tweet-input').value = text;
-                } catch (err) {
-                    console.error('Failed to read clipboard contents: ', err);
-                }
-            });
-
-            function displayResults(data) {
-                if (data.error) {
-                    results.innerHTML = `<p>Error: ${data.error}</p>`;
-                    return;
-                }
-                results.style.display = 'flex';
-                results.innerHTML = `
-                    <div class="col-md-6 mb-4">
-                        <div class="dashboard-card">
-                            <div class="card-header">
-                                <i class="fas fa-chart-pie"></i> AWS Sentiment
-                            </div>
-                            <div class="card-body">
-                                <h2 class="text-center">${data.aws_sentiment}</h2>
-                            </div>
-                        </div>
-                    </div>
-                    <div class="col-md-6 mb-4">
-                        <div class="dashboard-card">
-                            <div class="card-header">
-                                <i class="fas fa-comment-dots"></i> TextBlob Sentiment
-                            </div>
-                            <div class="card-body">
-                                <h2 class="text-center">${data.textblob_sentiment}</h2>
-                            </div>
-                        </div>
-                    </div>
-                    <div class="col-md-6 mb-4">
-                        <div class="dashboard-card">
-                            <div class="card-header">
-                                <i class="fas fa-chart-bar"></i> AWS Sentiment Scores
-                            </div>
-                            <div class="card-body">
-                                <canvas id="aws-sentiment-chart"></canvas>
-                            </div>
-                        </div>
-                    </div>
-                    <div class="col-md-6 mb-4">
-                        <div class="dashboard-card">
-                            <div class="card-header">
-                                <i class="fas fa-balance-scale"></i> Sentiment Comparison
-                            </div>
-                            <div class="card-body">
-                                <canvas id="sentiment-comparison-chart"></canvas>
-                            </div>
-                        </div>
-                    </div>
-                    <div class="col-md-6 mb-4">
-                        <div class="dashboard-card">
-                            <div class="card-header">
-                                <i class="fas fa-key"></i> Key Phrases
-                            </div>
-                            <div class="card-body scroll-box">
-                                <ul class="list-group list-group-flush" id="key-phrases-list">
-                                    ${data.key_phrases.map(phrase => `<li class="list-group-item">${phrase}</li>`).join('')}
-                                </ul>
-                            </div>
-                        </div>
-                    </div>
-                    <div class="col-md-6 mb-4">
-                        <div class="dashboard-card">
-                            <div class="card-header">
-                                <i class="fas fa-tags"></i> Entities
-                            </div>
-                            <div class="card-body scroll-box">
-                                <ul class="list-group list-group-flush" id="entities-list">
-                                    ${data.entities.map(entity => `<li class="list-group-item">${entity.Text} (${entity.Type})</li>`).join('')}
-                                </ul>
-                            </div>
-                        </div>
-                    </div>
-                    <div class="col-md-6 mb-4">
-                        <div class="dashboard-card">
-                            <div class="card-header">
-                                <i class="fas fa-info-circle"></i> Text Stats
-                            </div>
-                            <div class="card-body">
-                                <div class="row">
-                                    <div class="col-6">
-                                        <h4 class="text-center">${data.word_count}</h4>
-                                        <p class="text-center">Words</p>
-                                    </div>
-                                    <div class="col-6">
-                                        <h4 class="text-center">${data.char_count}</h4>
-                                        <p class="text-center">Characters</p>
-                                    </div>
-                                </div>
-                            </div>
-                        </div>
-                    </div>
-                `;
-                updateCharts(data);
-                animateResults();
-            }
-
-            function updateCharts(data) {
-                updateSentimentChart(data.aws_scores);
-                updateSentimentComparisonChart(data);
-            }
-
-            function updateSentimentChart(scores) {
-                const ctx = document.getElementById('aws-sentiment-chart').getContext('2d');
-                if (charts.sentiment) charts.sentiment.destroy();
-                charts.sentiment = new Chart(ctx, {
-                    type: 'bar',
-                    data: {
-                        labels: Object.keys(scores),
-                        datasets: [{
-                            label: 'AWS Sentiment Scores',
-                            data: Object.values(scores),
-                            borderColor: [
-                                'rgba(75, 192, 192, 1)',
-                                'rgba(255, 99, 132, 1)',
-                                'rgba(54, 162, 235, 1)',
-                                'rgba(255, 206, 86, 1)'
-                            ],
-                            borderWidth: 1
-                        }]
-                    },
-                    options: {
-                        scales: {
-                            y: {
-                                beginAtZero: true
-                            }
-                        },
-                        animation: {
-                            duration: 1500,
-                            easing: 'easeOutQuart'
-                        }
-                    }
-                });
-            }
-
-            function updateSentimentComparisonChart(data) {
-                const ctx = document.getElementById('sentiment-comparison-chart').getContext('2d');
-                if (charts.comparison) charts.comparison.destroy();
-                charts.comparison = new Chart(ctx, {
-                    type: 'radar',
-                    data: {
-                        labels: ['Positive', 'Negative', 'Neutral', 'Mixed'],
-                        datasets: [{
-                            label: 'AWS',
-                            data: [
-                                data.aws_scores.Positive,
-                                data.aws_scores.Negative,
-                                data.aws_scores.Neutral,
-                                data.aws_scores.Mixed
-                            ],
-                            backgroundColor: 'rgba(75, 192, 192, 0.2)',
-                            borderColor: 'rgba(75, 192, 192, 1)',
-                            pointBackgroundColor: 'rgba(75, 192, 192, 1)',
-                            pointBorderColor: '#fff',
-                            pointHoverBackgroundColor: '#fff',
-                            pointHoverBorderColor: 'rgba(75, 192, 192, 1)'
-                        }, {
-                            label: 'TextBlob',
-                            data: [
-                                data.textblob_sentiment === 'POSITIVE' ? 1 : 0,
-                                data.textblob_sentiment === 'NEGATIVE' ? 1 : 0,
-                                data.textblob_sentiment === 'NEUTRAL' ? 1 : 0,
-                                0 // TextBlob doesn't have a 'Mixed' category
-                            ],
-                            backgroundColor: 'rgba(255, 99, 132, 0.2)',
-                            borderColor: 'rgba(255, 99, 132, 1)',
-                            pointBackgroundColor: 'rgba(255, 99, 132, 1)',
-                            pointBorderColor: '#fff',
-                            pointHoverBackgroundColor: '#fff',
-                            pointHoverBorderColor: 'rgba(255, 99, 132, 1)'
-                        }]
-                    },
-                    options: {
-                        elements: {
-                            line: {
-                                borderWidth: 3
-                            }
-                        },
-                        animation: {
-                            duration: 1500,
-                            easing: 'easeOutQuart'
-                        }
-                    }
-                });
-            }
-
-            function animateResults() {
-                anime({
-                    targets: '.dashboard-card',
-                    opacity: [0, 1],
-                    translateY: [50, 0],
-                    delay: anime.stagger(100)
-                });
-
-                anime({
-                    targets: '#key-phrases-list li, #entities-list li',
-                    opacity: [0, 1],
-                    translateX: [50, 0],
-                    delay: anime.stagger(50)
-                });
-            }
-
-            // Add real-time character count
-            const tweetInput = document.getElementById('tweet-input');
-            const charCount = document.createElement('div');
-            charCount.classList.add('text-muted', 'mt-2');
-            tweetInput.parentNode.insertBefore(charCount, tweetInput.nextSibling);
-
-            tweetInput.addEventListener('input', function() {
-                charCount.textContent = `${this.value.length} characters`;
-            });
-
-            // Add a feature to save analysis results
-            const saveButton = document.createElement('button');
-            saveButton.textContent = 'Save Analysis';
-            saveButton.classList.add('btn', 'btn-success', 'mt-3');
-            saveButton.style.display = 'none';
-            form.appendChild(saveButton);
-
-            saveButton.addEventListener('click', function() {
-                const results = document.getElementById('results').innerHTML;
-                const blob = new Blob([results], {type: 'text/html'});
-                const a = document.createElement('a');
-                a.href = URL.createObjectURL(blob);
-                a.download = 'sentiment_analysis_results.html';
-                a.click();
-            });
-
-            // Show save button after analysis
-            form.addEventListener('submit', function() {
-                saveButton.style.display = 'inline-block';
-            });
-
-            // Add a theme toggle feature
-            const themeToggle = document.createElement('button');
-            themeToggle.textContent = 'Toggle Dark Mode';
-            themeToggle.classList.add('btn', 'btn-outline-secondary', 'mt-3', 'ms-3');
-            form.appendChild(themeToggle);
-
-            themeToggle.addEventListener('click', function() {
-                document.body.classList.toggle('dark-mode');
-                updateChartsTheme();
-            });
-
-            function updateChartsTheme() {
-                const isDarkMode = document.body.classList.contains('dark-mode');
-                const textColor = isDarkMode ? '#ffffff' : '#000000';
-                
-                Object.values(charts).forEach(chart => {
-                    chart.options.plugins.legend.labels.color = textColor;
-                    chart.options.scales.x.ticks.color = textColor;
-                    chart.options.scales.y.ticks.color = textColor;
-                    chart.update();
-                });
-            }
-
-            // Add dark mode styles
-            const style = document.createElement('style');
-            style.textContent = `
-                .dark-mode {
-                    background-color: #2c3e50;
-                    color: #ecf0f1;
-                }
-                .dark-mode .dashboard-card {
-                    background-color: #34495e;
-                }
-                .dark-mode .card-header {
-                    background-color: #2980b9;
-                }
-                .dark-mode .btn-primary {
-                    background-color: #3498db;
-                    border-color: #3498db;
-                }
-                .dark-mode .btn-primary:hover {
-                    background-color: #2980b9;
-                    border-color: #2980b9;
-                }
-            `;
-            document.head.appendChild(style);
-
-            // Add event listener for CSV form
-            document.getElementById('csv-form').addEventListener('submit', async (e) => {
-                e.preventDefault();
-                const formData = new FormData(e.target);
-                try {
-                    const response = await fetch('/', {
-                        method: 'POST',
-                        body: formData
-                    });
-                    if (!response.ok) {
-                        throw new Error(`HTTP error! status: ${response.status}`);
-                    }
-                    const result = await response.text();
-                    document.getElementById('results').innerHTML = result;
-                    document.getElementById('results').style.display = 'block';
-                } catch (error) {
-                    console.error("Error:", error);
-                    document.getElementById('results').innerHTML = `<p>Error: ${error.message}</p>`;
-                    document.getElementById('results').style.display = 'block';
-                }
-            });
-        </script>
-    </body>
-    </html>
-    ''')
+    return render_template('index.html')
 
 @app.route('/analyze', methods=['POST'])
 def analyze():
     app.logger.debug("Received request for sentiment analysis")
     data = request.json
     tweet = data['tweet']
-    app.logger.debug(f"Analyzing tweet: {tweet}")
     try:
-        result = analyze_sentiment(tweet)
-        app.logger.debug(f"Analysis result: {result}")
-        return jsonify(result)
+        options = parse_analysis_options(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    # Lazy %-formatting: payloads are only rendered when DEBUG logging is on
+    app.logger.debug("Analyzing tweet: %s", tweet)
+    try:
+        result = analyze_sentiment_batch([tweet], **options)[0]
     except Exception as e:
         app.logger.error(f"Error during analysis: {str(e)}")
         return jsonify({"error": str(e)}), 500
+    if 'error' in result:
+        app.logger.error(f"Error during analysis: {result['error']}")
+        return jsonify(result), 500
+    app.logger.debug("Analysis result: %s", result)
+    return jsonify(result)
+
+def _item_text(item):
+    # Batch items may be plain strings or objects with a "text" field; anything else fails that item only
+    text = item.get('text') if isinstance(item, dict) else item
+    if not isinstance(text, str):
+        raise ValueError('Expected a string or an object with a string "text" field')
+    return text
+
+def _analyze_batch_texts(texts, options):
+    return analyze_texts(texts, workers=app.config['BATCH_WORKERS'], **options)
+
+def _analyze_items(items, options):
+    # items are (text, error) pairs; only the valid texts are analyzed, and errors keep their place
+    texts = [text for text, error in items if error is None]
+    results = iter(_analyze_batch_texts(texts, options)) if texts else iter(())
+    return [{"error": error} if error is not None else next(results) for _, error in items]
+
+def _parse_item(item):
+    try:
+        return _item_text(item), None
+    except ValueError as e:
+        return None, str(e)
+
+def _analyze_ndjson_lines(lines, options, max_texts, chunk_size=100):
+    # Lines are analyzed and written back a chunk at a time, so neither side of a large
+    # batch is ever held in memory as one document
+    pending = []
+    count = 0
+
+    def flush():
+        for result in _analyze_items(pending, options):
+            yield json.dumps(result) + '\n'
+        pending.clear()
+
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        count += 1
+        if count > max_texts:
+            yield from flush()
+            yield json.dumps({"error": f"Batch limit of {max_texts} texts exceeded; remaining lines were not analyzed"}) + '\n'
+            return
+        try:
+            item = json.loads(line)
+        except ValueError:
+            pending.append((None, f"Invalid JSON on line {line_number}"))
+        else:
+            text, error = _parse_item(item)
+            pending.append((text, None if error is None else f"Line {line_number}: {error}"))
+        if len(pending) >= chunk_size:
+            yield from flush()
+    yield from flush()
+
+@app.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
+    max_texts = app.config['MAX_BATCH_TEXTS']
+    ndjson_request = request.mimetype == NDJSON_MIMETYPE
+    ndjson_response = ndjson_request or request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+    if ndjson_request:
+        # NDJSON clients pass options in the query string since the body is only texts
+        try:
+            options = parse_analysis_options(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        lines = (line.decode('utf-8') for line in request.stream)
+        return Response(stream_with_context(_analyze_ndjson_lines(lines, options, max_texts)), mimetype=NDJSON_MIMETYPE)
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('texts'), list):
+        return jsonify({"error": 'Expected a JSON object with a "texts" list'}), 400
+    if len(data['texts']) > max_texts:
+        return jsonify({"error": f"At most {max_texts} texts are accepted per batch, got {len(data['texts'])}"}), 413
+    try:
+        options = parse_analysis_options(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    results = _analyze_items([_parse_item(item) for item in data['texts']], options)
+    if ndjson_response:
+        return Response((json.dumps(result) + '\n' for result in results), mimetype=NDJSON_MIMETYPE)
+    return jsonify({'results': results})
+
+def _format_event(name, payload, event_format):
+    if event_format == 'ndjson':
+        return json.dumps(dict(payload, event=name)) + '\n'
+    return f"event: {name}\ndata: {json.dumps(payload)}\n\n"
+
+def _stream_rows(texts, options, event_format, max_chunk=100):
+    counts = Counter()
+    results = []
+    position = 0
+    chunk_size = 1
+    while position < len(texts):
+        chunk = texts[position:position + chunk_size]
+        for offset, result in enumerate(_analyze_batch_texts(chunk, options)):
+            results.append(result)
+            counts['ERROR' if 'error' in result else (result.get('aws_sentiment') or 'N/A')] += 1
+            yield _format_event('row', {'index': position + offset, 'result': result, 'counts': counts}, event_format)
+        position += len(chunk)
+        # The first chunk is a single row so it arrives after one round trip; later chunks grow
+        # until they fill the concurrent batch pipeline
+        chunk_size = min(chunk_size * 2, max_chunk)
+    # The finished rows are kept server-side so the client can switch to the paginated table
+    job = jobs.add_completed(results, **options)
+    yield _format_event('done', {'rows': len(texts), 'counts': counts, 'job_id': job.id}, event_format)
+
+@app.route('/analyze/stream', methods=['POST'])
+def analyze_stream():
+    try:
+        texts, options = read_csv_upload(request)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 400
+
+    event_format = request.args.get('format', 'sse')
+    if event_format not in ('sse', 'ndjson'):
+        return jsonify({"error": f"Unknown format '{event_format}'. Choose sse or ndjson"}), 400
+    mimetype = NDJSON_MIMETYPE if event_format == 'ndjson' else 'text/event-stream'
+    return Response(_stream_rows(texts, options, event_format), mimetype=mimetype,
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    try:
+        texts, options = read_csv_upload(request)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 400
+
+    job = jobs.submit(texts, **options)
+    app.logger.info(f"Queued job {job.id} with {job.total} rows")
+    return jsonify({
+        'id': job.id,
+        'status_url': url_for('job_status', job_id=job.id),
+        'result_url': url_for('job_result', job_id=job.id),
+    }), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job '{job_id}'"}), 404
+    return jsonify(job.progress())
+
+def _stream_csv(table):
+    # Chunks go through the CLI's CsvWriter, so a download has the same layout as a CLI results file
+    buffer = io.StringIO()
+    with CsvWriter(buffer, table.columns) as writer:
+        for batch in table.iter_batches():
+            writer.write(batch)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def _stream_json(record_chunks):
+    yield '['
+    separator = ''
+    for records in record_chunks:
+        for record in records:
+            yield separator + json.dumps(record)
+            separator = ','
+    yield ']'
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job '{job_id}'"}), 404
+    if job.status != 'done':
+        return jsonify(job.progress()), 409
+
+    output_format = request.args.get('format', 'csv')
+    if output_format == 'csv':
+        return Response(_stream_csv(job.table), mimetype='text/csv',
+                        headers={'Content-Disposition': f'attachment; filename=sentitweet_{job.id}.csv'})
+    if output_format == 'json':
+        return Response(_stream_json(job.table.iter_records()), mimetype='application/json')
+    return jsonify({"error": f"Unknown format '{output_format}'. Choose csv or json"}), 400
+
+@app.route('/jobs/<job_id>/rows', methods=['GET'])
+def job_rows(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job '{job_id}'"}), 404
+    if job.status != 'done':
+        return jsonify(job.progress()), 409
+
+    args = request.args
+    try:
+        page = max(1, int(args.get('page', 1)))
+        per_page = min(500, max(1, int(args.get('per_page', 50))))
+        result = job.table.page(
+            page=page,
+            per_page=per_page,
+            sort=args.get('sort', 'index'),
+            descending=args.get('order') == 'desc',
+            sentiment=args.get('sentiment'),
+            textblob_sentiment=args.get('textblob_sentiment'),
+            entity_type=args.get('entity_type'),
+            query=args.get('q'),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    result['entity_types'] = job.table.entity_types()
+    return jsonify(result)
+
+@app.route('/jobs/<job_id>/aggregates', methods=['GET'])
+def job_aggregates(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job '{job_id}'"}), 404
+    if job.status != 'done':
+        return jsonify(job.progress()), 409
+
+    try:
+        top_n = min(100, max(1, int(request.args.get('top', 20))))
+        length_bins = min(50, max(1, int(request.args.get('length_bins', 5))))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(job.table.aggregates().summary(top_n=top_n, length_bins=length_bins))
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    # Prometheus text exposition of the server process' stage timings and counters
+    return Response(METRICS.prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
 
 def generate_visualizations(df):
+    # Only used with SERVER_PLOTS; matplotlib and seaborn are imported here so web workers don't load them at startup
+    with METRICS.time('visualization'):
+        return _generate_visualizations(df)
+
+def _generate_visualizations(df):
+    import base64
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     visualizations = {}
     
     try:
@@ -596,32 +406,12 @@ def generate_visualizations(df):
     
     return visualizations
 
-def render_results(df, visualizations):
-    return render_template_string('''
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>SentiTweet - Analysis Results</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-    </head>
-    <body>
-        <div class="container mt-5">
-            <h1>Analysis Results</h1>
-            <h2>Visualizations</h2>
-            {% for name, img_data in visualizations.items() %}
-                <h3>{{ name }}</h3>
-                <img src="data:image/png;base64,{{ img_data }}" alt="{{ name }}" class="img-fluid">
-            {% endfor %}
-            <h2>Raw Data</h2>
-            {{ df.to_html(classes="table table-striped") | safe }}
-        </div>
-    </body>
-    </html>
-    ''', df=df, visualizations=visualizations)
+def render_results(job, visualizations):
+    return render_template('results.html', job=job, visualizations=visualizations)
 
 def run_web_app():
+    # Development server with the reloader and verbose logging; use `python main.py serve` in production
+    logging.basicConfig(level=logging.DEBUG)
     app.run(debug=True)
 
 if __name__ == '__main__':
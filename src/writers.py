@@ -0,0 +1,138 @@
+from src.metrics import METRICS
+from src.results import COUNT_COLUMNS, ResultBatch, arrow_schema
+import os
+import pandas as pd
+
+OUTPUT_FORMATS = ('csv', 'jsonl', 'parquet', 'arrow')
+EXTENSIONS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.parquet': 'parquet', '.arrow': 'arrow',
+              '.feather': 'arrow'}
+# Formats written through pyarrow, an optional dependency
+ARROW_FORMATS = ('parquet', 'arrow')
+
+# Larger batches are split into Parquet row groups / Arrow record batches of this many rows
+WRITE_CHUNK_SIZE = 100000
+
+def output_format(path, fmt=None):
+    # An explicit format wins; otherwise the extension decides, falling back to CSV
+    if fmt is None:
+        fmt = EXTENSIONS.get(os.path.splitext(path)[1].lower(), 'csv')
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format '{fmt}'. Choose from: {', '.join(OUTPUT_FORMATS)}")
+    if fmt in ARROW_FORMATS:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError(f"The {fmt} output format requires pyarrow (pip install pyarrow)") from None
+    return fmt
+
+class ResultWriter:
+    # Appends results to one output file, chunk by chunk; the file is complete once closed
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = columns
+        self.rows = 0
+
+    def write(self, results):
+        # results is a ResultBatch, or result dicts / a results DataFrame, which are packed into one first
+        with METRICS.time('write', len(results)):
+            if not isinstance(results, ResultBatch):
+                results = ResultBatch.from_results(results, self.columns)
+            self._write(results)
+        self.rows += len(results)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class CsvWriter(ResultWriter):
+    # Keeps the original CSV layout, nested values included, for existing consumers. path may also be
+    # an open text file (e.g. a StringIO), which is written to but left open
+    def __init__(self, path, columns):
+        super().__init__(path, columns)
+        self.owns_file = isinstance(path, (str, os.PathLike))
+        self.file = open(path, 'w', newline='', encoding='utf-8') if self.owns_file else path
+
+    def _write(self, batch):
+        frame = pd.DataFrame(batch.records(), columns=self.columns)
+        # Nullable integers, so counts print as 8 whether or not the chunk has a failed row
+        for column in COUNT_COLUMNS:
+            frame[column] = batch.arrays[column]
+        frame.to_csv(self.file, header=self.rows == 0, index=False)
+        self.file.flush()
+
+    def close(self):
+        if self.file.closed:
+            return
+        if self.rows == 0:
+            pd.DataFrame(columns=self.columns).to_csv(self.file, index=False)
+        if self.owns_file:
+            self.file.close()
+
+class JsonlWriter(ResultWriter):
+    def __init__(self, path, columns):
+        super().__init__(path, columns)
+        self.file = open(path, 'w', encoding='utf-8')
+
+    def _write(self, batch):
+        frame = batch.to_pandas()
+        if len(frame):
+            # Scores are float32: seven decimals is all they carry, and avoids printing widening noise
+            self.file.write(frame.to_json(orient='records', lines=True, force_ascii=False, double_precision=7))
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class ArrowWriter(ResultWriter):
+    # Arrow IPC file (Feather v2): uncompressed record batches that reload without any parsing
+    def __init__(self, path, columns):
+        super().__init__(path, columns)
+        self.schema = arrow_schema(columns)
+        self.writer = self._open()
+
+    def _open(self):
+        import pyarrow as pa
+        return pa.ipc.new_file(self.path, self.schema)
+
+    def _write(self, batch):
+        self.writer.write_table(batch.to_arrow(), max_chunksize=WRITE_CHUNK_SIZE)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+class ParquetWriter(ArrowWriter):
+    # Each written batch becomes a row group, so streaming runs never hold more than one chunk
+    def _open(self):
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(self.path, self.schema)
+
+    def _write(self, batch):
+        self.writer.write_table(batch.to_arrow(), row_group_size=WRITE_CHUNK_SIZE)
+
+WRITERS = {'csv': CsvWriter, 'jsonl': JsonlWriter, 'parquet': ParquetWriter, 'arrow': ArrowWriter}
+
+def open_writer(path, columns, fmt=None):
+    return WRITERS[output_format(path, fmt)](path, columns)
+
+def read_results(path, fmt=None):
+    # Loads a results file written by any of the writers; columnar formats keep their dtypes
+    fmt = output_format(path, fmt)
+    if fmt == 'csv':
+        return pd.read_csv(path)
+    if fmt == 'jsonl':
+        return pd.read_json(path, lines=True, dtype=False)
+    import pyarrow as pa
+    # Counts are null on failed rows; keep them integer instead of widening to float64
+    types_mapper = {pa.int32(): pd.Int32Dtype()}.get
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.read_table(path).to_pandas(types_mapper=types_mapper)
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).read_all().to_pandas(types_mapper=types_mapper)
@@ -0,0 +1,63 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import sentiment_analyzer  # noqa: E402
+
+class StubComprehend:
+    # Stands in for the boto3 Comprehend client: enforces the BatchDetect* limits, records every call,
+    # fails documents containing fail_word through the ErrorList and whole requests containing boom_word
+    def __init__(self, fail_word='FAIL', boom_word='BOOM'):
+        self.calls = []
+        self.lock = threading.Lock()
+        self.fail_word = fail_word
+        self.boom_word = boom_word
+
+    def _batch(self, name, TextList, detect, LanguageCode='en'):
+        assert 0 < len(TextList) <= 25
+        with self.lock:
+            self.calls.append((name, list(TextList), LanguageCode))
+        if any(self.boom_word in text for text in TextList):
+            raise RuntimeError('request failed')
+        results, errors = [], []
+        for index, text in enumerate(TextList):
+            assert 0 < len(text.encode('utf-8')) <= 5000
+            if self.fail_word in text:
+                errors.append({'Index': index, 'ErrorCode': 'INTERNAL_SERVER_ERROR', 'ErrorMessage': f'cannot analyze {text}'})
+            else:
+                results.append(dict(detect(text), Index=index))
+        # Comprehend does not promise any order within the lists
+        return {'ResultList': results[::-1], 'ErrorList': errors[::-1]}
+
+    @staticmethod
+    def score(text):
+        positive = 0.75 if 'love' in text else 0.125
+        return {'Sentiment': 'POSITIVE' if positive > 0.5 else 'NEUTRAL',
+                'SentimentScore': {'Positive': positive, 'Negative': 0.125, 'Neutral': 0.875 - positive, 'Mixed': 0.0}}
+
+    def batch_detect_sentiment(self, **kwargs):
+        return self._batch('sentiment', detect=self.score, **kwargs)
+
+    def batch_detect_key_phrases(self, **kwargs):
+        return self._batch('key_phrases', detect=lambda text: {'KeyPhrases': [{'Text': word} for word in text.split()[:2]]}, **kwargs)
+
+    def batch_detect_entities(self, **kwargs):
+        return self._batch('entities', detect=lambda text: {'Entities': [{'Text': word, 'Type': 'PERSON'} for word in text.split() if word.istitle()]}, **kwargs)
+
+    def batch_detect_dominant_language(self, **kwargs):
+        return self._batch('language', detect=lambda text: {'Languages': [{'LanguageCode': 'en', 'Score': 0.99}]}, **kwargs)
+
+    def texts_sent(self, name):
+        return [text for call, texts, _ in self.calls if call == name for text in texts]
+
+@pytest.fixture
+def comprehend():
+    # Injected as the shared client for the test, then removed again
+    client = StubComprehend()
+    sentiment_analyzer.set_comprehend_client(client)
+    yield client
+    sentiment_analyzer.set_comprehend_client(None)
@@ -0,0 +1,29 @@
+from src.cache import ResultCache
+from src.pipeline import analyze_texts
+
+TEXTS = ['I love this', 'just a day', 'FAIL to analyze']
+
+def test_cache_hits_skip_the_client(comprehend, tmp_path):
+    path = str(tmp_path / 'results.sqlite')
+    cache = ResultCache(path)
+    first = analyze_texts(TEXTS, cache=cache)
+    calls = len(comprehend.calls)
+    assert calls
+
+    # Served from the memory tier, then from disk by a fresh cache; only the failed text is retried
+    assert analyze_texts(TEXTS, cache=cache) == first
+    cache.close()
+    cache = ResultCache(path)
+    assert analyze_texts(TEXTS, cache=cache) == first
+    assert all(texts == ['FAIL to analyze'] for _, texts, _ in comprehend.calls[calls:])
+    stats = cache.stats()
+    assert (stats['disk_hits'], stats['misses']) == (2, 1)
+    cache.close()
+
+def test_cache_is_keyed_by_features(comprehend, tmp_path):
+    cache = ResultCache(str(tmp_path / 'results.sqlite'))
+    analyze_texts(TEXTS[:2], cache=cache, features=['sentiment'])
+    calls = len(comprehend.calls)
+    analyze_texts(TEXTS[:2], cache=cache)
+    assert len(comprehend.calls) > calls
+    cache.close()
@@ -0,0 +1,53 @@
+import sys
+
+import pandas as pd
+import pytest
+
+from src import sentiment_analyzer
+from src.cli import run_cli
+from tests.conftest import StubComprehend
+
+class Crash(BaseException):
+    # Not an Exception, so nothing on the way up mistakes it for a failed request
+    pass
+
+class CrashingComprehend(StubComprehend):
+    def __init__(self, crash_on_call):
+        super().__init__()
+        self.crash_on_call = crash_on_call
+
+    def batch_detect_entities(self, **kwargs):
+        if len(self.calls) + 1 >= self.crash_on_call:
+            raise Crash()
+        return super().batch_detect_entities(**kwargs)
+
+def run(monkeypatch, client, *args):
+    sentiment_analyzer.set_comprehend_client(client)
+    monkeypatch.setattr(sys, 'argv', ['main.py', *map(str, args)])
+    try:
+        run_cli()
+    finally:
+        sentiment_analyzer.set_comprehend_client(None)
+
+def test_resume_after_crash_matches_an_uninterrupted_run(tmp_path, monkeypatch, capsys):
+    input_file = tmp_path / 'in.csv'
+    texts = [f'I love row {index}' if index % 3 else f'FAIL row {index}' for index in range(23)]
+    pd.DataFrame({'text': texts}).to_csv(input_file, index=False)
+    options = ['--stream', '--chunksize', 5, '--no-cache', '--plots', 'sentiment_distribution']
+
+    run(monkeypatch, StubComprehend(), input_file, tmp_path / 'full.csv', tmp_path / 'viz', *options)
+
+    # Each chunk makes three calls; the crash hits the entities call of the third chunk
+    partial = tmp_path / 'partial.csv'
+    with pytest.raises(Crash):
+        run(monkeypatch, CrashingComprehend(crash_on_call=9), input_file, partial, tmp_path / 'viz', *options)
+    assert (tmp_path / 'partial.csv.checkpoint').exists()
+    capsys.readouterr()
+
+    resumed = StubComprehend()
+    run(monkeypatch, resumed, input_file, partial, tmp_path / 'viz', *options, '--resume')
+    assert partial.read_bytes() == (tmp_path / 'full.csv').read_bytes()
+    assert not (tmp_path / 'partial.csv.checkpoint').exists()
+    # Only the rows after the two journaled chunks were analyzed again
+    assert resumed.texts_sent('sentiment') == texts[10:]
+    assert 'Resumed: 10 rows restored from the checkpoint + 13 analyzed in this run = 23 rows' in capsys.readouterr().out
@@ -0,0 +1,42 @@
+import pytest
+
+from src import sentiment_analyzer
+from src.sentiment_analyzer import configure_comprehend_client, get_comprehend_client
+
+@pytest.fixture
+def client_options(monkeypatch):
+    # Built clients need a region but no credentials or network; the options are restored afterwards
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    monkeypatch.setattr(sentiment_analyzer, 'CLIENT_OPTIONS', dict(sentiment_analyzer.CLIENT_OPTIONS))
+    sentiment_analyzer.set_comprehend_client(None)
+    yield
+    sentiment_analyzer.set_comprehend_client(None)
+
+def test_injected_client_is_used_and_kept(comprehend, monkeypatch):
+    assert get_comprehend_client() is comprehend
+    configure_comprehend_client(max_pool_connections=20)
+    # As if the process had forked: an injected client is still not replaced
+    monkeypatch.setattr(sentiment_analyzer, '_client_pid', -1)
+    assert get_comprehend_client() is comprehend
+    sentiment_analyzer.analyze_sentiment_batch(['I love it'])
+    assert comprehend.calls
+
+def test_built_client_is_reused_until_reconfigured(client_options):
+    client = get_comprehend_client()
+    assert get_comprehend_client() is client
+    assert client.meta.config.retries['total_max_attempts'] == 1
+
+    configure_comprehend_client(max_pool_connections=32)
+    rebuilt = get_comprehend_client()
+    assert rebuilt is not client
+    assert rebuilt.meta.config.max_pool_connections == 32
+    assert get_comprehend_client() is rebuilt
+
+def test_built_client_is_rebuilt_after_fork(client_options, monkeypatch):
+    client = get_comprehend_client()
+    monkeypatch.setattr(sentiment_analyzer, '_client_pid', -1)
+    assert get_comprehend_client() is not client
+
+def test_unknown_client_option_is_rejected(client_options):
+    with pytest.raises(ValueError, match='Unknown Comprehend client options'):
+        configure_comprehend_client(pool=3)
@@ -0,0 +1,19 @@
+import pandas as pd
+import pytest
+
+from src.data_processor import process_tweets, save_results
+from src.sentiment_analyzer import RESULT_COLUMNS
+from src.writers import OUTPUT_FORMATS, read_results
+
+@pytest.mark.parametrize('fmt', OUTPUT_FORMATS)
+def test_processed_tweets_can_be_saved(comprehend, tmp_path, fmt):
+    results = process_tweets(pd.DataFrame({'text': ['I love this', 'FAIL here', '', 'Just Bob']}))
+    assert 'language' in results
+    path = str(tmp_path / f'results.{fmt}')
+    save_results(results, path)
+    saved = read_results(path)
+    assert 'language' not in saved
+    assert len(saved) == 4
+    assert saved['error'].notna().tolist() == [False, True, True, False]
+    if fmt == 'csv':
+        assert list(saved.columns) == RESULT_COLUMNS
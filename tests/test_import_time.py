@@ -0,0 +1,12 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_entry_points_within_import_budget():
+    # IMPORT_TIME_SCALE loosens every budget on slow machines, like the script's --scale
+    scale = os.environ.get('IMPORT_TIME_SCALE', '1.0')
+    result = subprocess.run([sys.executable, os.path.join('scripts', 'import_time.py'), '--check', '--scale', scale],
+                            cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,33 @@
+import pytest
+
+from src import language
+from src.language import DEFAULT_LANGUAGE, _stopword_language, detect_languages
+
+@pytest.fixture
+def word_lists_only(monkeypatch):
+    # As without langdetect installed: Latin-script texts are placed by the stopword lists alone
+    monkeypatch.setattr(language, '_langdetect', lambda: None)
+
+@pytest.mark.parametrize('text', ['Love a good movie night', 'I e-mailed a friend', 'la la land', 'o meu amor', 'Bob y Ann'])
+def test_one_hit_or_a_narrow_lead_is_not_a_language(word_lists_only, text):
+    assert _stopword_language(text) is None
+    assert detect_languages([text]) == [DEFAULT_LANGUAGE]
+
+@pytest.mark.parametrize('text, code', [
+    ('I love this movie and the music', 'en'),
+    ('Hoy es un día muy bueno', 'es'),
+    ('Eu estou muito feliz hoje com você', 'pt'),
+    ('Je suis très content de mon achat', 'fr'),
+    ('Questo film è molto bello', 'it'),
+    ('Das ist sehr gut', 'de'),
+])
+def test_clear_stopword_majority_picks_the_language(word_lists_only, text, code):
+    assert _stopword_language(text) == code
+    assert detect_languages([text]) == [code]
+
+def test_scripts_and_comprehend_fallback(word_lists_only, comprehend):
+    texts = ['東京タワーに行った', '서울은 좋아요', 'Love a good movie night', '123']
+    assert detect_languages(texts) == ['ja', 'ko', DEFAULT_LANGUAGE, DEFAULT_LANGUAGE]
+    # Only the undecided texts are sent to Comprehend
+    assert detect_languages(texts, comprehend) == ['ja', 'ko', 'en', 'en']
+    assert comprehend.texts_sent('language') == ['Love a good movie night', '123']
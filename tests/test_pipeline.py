@@ -0,0 +1,26 @@
+from collections import Counter
+
+from src.pipeline import analyze_texts
+
+def test_dedupe_fans_results_out_to_every_duplicate(comprehend):
+    texts = ['I love this', 'meh', 'I love this', 'FAIL', 'meh', 'I love this', 'FAIL']
+    stats = Counter()
+    results = analyze_texts(texts, stats=stats)
+    assert comprehend.texts_sent('sentiment') == ['I love this', 'meh', 'FAIL']
+    assert (stats['rows'], stats['unique_texts']) == (7, 3)
+    assert [result.get('text') for result in results] == ['I love this', 'meh', 'I love this', None, 'meh', 'I love this', None]
+    assert [result.get('aws_sentiment') for result in results[:3]] == ['POSITIVE', 'NEUTRAL', 'POSITIVE']
+    assert results[3] == results[6] == {'error': 'cannot analyze FAIL', 'language': 'en'}
+
+def test_clean_dedupe_keeps_row_local_fields(comprehend):
+    texts = ['I love @bob this!', 'I love this', 'I  love this']
+    results = analyze_texts(texts, dedupe='clean')
+    assert len(comprehend.texts_sent('sentiment')) == 1
+    assert [result['text'] for result in results] == texts
+    assert [result['char_count'] for result in results] == [len(text) for text in texts]
+    assert len({result['aws_sentiment'] for result in results}) == 1
+
+def test_unhashable_texts_are_reported_not_merged(comprehend):
+    results = analyze_texts([['a'], 'fine', ['a']])
+    assert results[0]['error'] == results[2]['error'] == "Invalid text: ['a']"
+    assert 'error' not in results[1]
@@ -0,0 +1,41 @@
+from src.sentiment_analyzer import BATCH_SIZE, analyze_sentiment_batch
+
+def test_texts_are_sent_in_batches_of_25(comprehend):
+    texts = [f'text number {index}' for index in range(2 * BATCH_SIZE + 10)]
+    analyze_sentiment_batch(texts)
+    for feature in ('sentiment', 'key_phrases', 'entities'):
+        sizes = [len(sent) for name, sent, _ in comprehend.calls if name == feature]
+        assert sizes == [BATCH_SIZE, BATCH_SIZE, 10]
+        assert comprehend.texts_sent(feature) == texts
+
+def test_error_list_indexes_map_back_to_their_rows(comprehend):
+    texts = [f'row {index} FAIL' if index in (3, 24, 27) else f'row {index} I love it' for index in range(30)]
+    results = analyze_sentiment_batch(texts)
+    for index, result in enumerate(results):
+        if index in (3, 24, 27):
+            assert result == {'error': f'cannot analyze {texts[index]}', 'language': 'en'}
+        else:
+            assert result['text'] == texts[index]
+            assert result['aws_sentiment'] == 'POSITIVE'
+            assert result['key_phrases'] == ['row', str(index)]
+
+def test_rows_keep_their_order_across_partial_failures(comprehend):
+    # The second batch fails as a whole request, a document of the third through the ErrorList, and an
+    # invalid row never reaches the client
+    texts = [f'text {index}' for index in range(3 * BATCH_SIZE)]
+    texts[30] = 'BOOM'
+    texts[60] = 'FAIL here'
+    texts[5] = ''
+    results = analyze_sentiment_batch(texts, workers=4)
+    assert len(results) == len(texts)
+    for index, result in enumerate(results):
+        if index == 5:
+            assert result['error'] == "Invalid text: ''"
+        elif index == 60:
+            assert result['error'] == 'cannot analyze FAIL here'
+        elif BATCH_SIZE < index <= 2 * BATCH_SIZE:
+            # Only valid texts are batched, so the skipped row shifts the failed request to rows 26..50
+            assert result['error'] == 'request failed'
+        else:
+            assert 'error' not in result
+            assert result['text'] == texts[index]
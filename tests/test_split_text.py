@@ -0,0 +1,68 @@
+import pytest
+
+from src.sentiment_analyzer import MAX_DOCUMENT_BYTES, _merge_segments, analyze_sentiment_batch, split_text
+
+def utf8_length(text):
+    return len(text.encode('utf-8'))
+
+def test_short_text_is_one_segment():
+    assert split_text('I love it. Really.') == ['I love it. Really.']
+    # 1250 four-byte characters sit exactly on the limit
+    text = '😀' * (MAX_DOCUMENT_BYTES // 4)
+    assert split_text(text) == [text]
+
+@pytest.mark.parametrize('sentence', ['Café crème brûlée était très bon.', '東京の夜景はとても綺麗でした。 本当に。', 'Plain ascii words here!'])
+def test_long_text_is_cut_at_sentences_under_the_byte_limit(sentence):
+    text = ' '.join([sentence] * 400)
+    segments = split_text(text)
+    assert len(segments) > 1
+    assert all(utf8_length(segment) <= MAX_DOCUMENT_BYTES for segment in segments)
+    # Few segments: each is filled close to the limit before a new one starts
+    assert len(segments) == -(-utf8_length(text) // (MAX_DOCUMENT_BYTES - utf8_length(sentence)))
+    assert ' '.join(segments).split() == text.split()
+    assert all(segment.endswith(sentence[-1]) for segment in segments)
+
+def test_oversized_sentence_is_cut_at_whitespace():
+    text = ' '.join(['héllo wörld'] * 600)
+    segments = split_text(text)
+    assert all(utf8_length(segment) <= MAX_DOCUMENT_BYTES for segment in segments)
+    assert ' '.join(segments).split() == text.split()
+
+def test_oversized_word_is_cut_at_a_character_boundary():
+    # Three-byte characters with no whitespace or sentence break: the byte limit falls inside a character
+    word = '東' * 2000
+    segments = split_text(word)
+    assert [utf8_length(segment) for segment in segments] == [4998, 1002]
+    assert ''.join(segments) == word
+    assert split_text('😀' * 5, max_bytes=10) == ['😀😀', '😀😀', '😀']
+
+def detected(positive, phrases=(), entities=()):
+    return {'sentiment': {'Sentiment': 'POSITIVE', 'SentimentScore': {'Positive': positive, 'Negative': 0.0,
+                                                                        'Neutral': 1.0 - positive, 'Mixed': 0.0}},
+            'key_phrases': [{'Text': phrase} for phrase in phrases],
+            'entities': [{'Text': text, 'Type': 'PERSON'} for text in entities]}
+
+def test_merge_weights_scores_by_segment_length_and_dedupes():
+    merged = _merge_segments([detected(1.0, ['a', 'b'], ['Bob']), detected(0.0, ['b', 'c'], ['Bob', 'Ann'])],
+                             ['x' * 10, 'y' * 30])
+    assert merged['sentiment']['SentimentScore'] == {'Positive': 0.25, 'Negative': 0.0, 'Neutral': 0.75, 'Mixed': 0.0}
+    # The label follows the merged scores, not any one segment
+    assert merged['sentiment']['Sentiment'] == 'NEUTRAL'
+    assert [phrase['Text'] for phrase in merged['key_phrases']] == ['a', 'b', 'c']
+    assert [entity['Text'] for entity in merged['entities']] == ['Bob', 'Ann']
+
+def test_merge_leaves_skipped_features_out():
+    outputs = [dict(detected(0.5), key_phrases=None, entities=None)] * 2
+    merged = _merge_segments(outputs, ['ab', 'cd'])
+    assert merged['key_phrases'] is None and merged['entities'] is None
+    assert merged['sentiment']['SentimentScore']['Positive'] == 0.5
+
+def test_long_multibyte_text_is_analyzed_as_one_result(comprehend):
+    text = ' '.join(['I love the café in München.'] + ['The weather in Zürich is grey and cool.'] * 300)
+    result = analyze_sentiment_batch([text, 'short'], language='en')[0]
+    # The stub rejects any document over the byte limit, so every segment was within it
+    sent = comprehend.texts_sent('sentiment')
+    assert len(sent) > 2 and sent[-1] == 'short'
+    assert result['text'] == text and 'error' not in result
+    assert 0.125 < result['aws_scores']['Positive'] < 0.75
+    assert result['key_phrases'][:2] == ['I', 'love']
@@ -0,0 +1,193 @@
+import io
+import json
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from src import sentiment_analyzer
+from src.web_app import app, jobs
+from tests.conftest import StubComprehend
+
+TEXTS = ['I love this movie', 'FAIL badly', 'Just Bob at home', 'I love Paris']
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    return app.test_client()
+
+def csv_upload(texts, **form):
+    data = io.BytesIO(pd.DataFrame({'text': texts}).to_csv(index=False).encode('utf-8'))
+    return dict(form, file=(data, 'texts.csv'))
+
+def wait_for(client, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = client.get(f'/jobs/{job_id}').get_json()
+        if status['status'] in ('done', 'failed'):
+            return status
+        time.sleep(0.02)
+    raise AssertionError(f'job {job_id} did not finish')
+
+class BlockingComprehend(StubComprehend):
+    # Holds every request until released, so a job can be observed while it is still running
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def _batch(self, *args, **kwargs):
+        assert self.release.wait(10)
+        return super()._batch(*args, **kwargs)
+
+def test_job_runs_in_the_background_and_exports_results(client):
+    comprehend = BlockingComprehend()
+    sentiment_analyzer.set_comprehend_client(comprehend)
+    try:
+        response = client.post('/jobs', data=csv_upload(TEXTS), content_type='multipart/form-data')
+        assert response.status_code == 202
+        job = response.get_json()
+        assert job['status_url'] == f"/jobs/{job['id']}"
+
+        assert client.get(f"/jobs/{job['id']}").get_json()['status'] in ('queued', 'running')
+        assert client.get(job['result_url']).status_code == 409
+        comprehend.release.set()
+        status = wait_for(client, job['id'])
+    finally:
+        comprehend.release.set()
+        sentiment_analyzer.set_comprehend_client(None)
+
+    assert status['status'] == 'done'
+    assert (status['rows_done'], status['rows_total']) == (4, 4)
+
+    rows = client.get(job['result_url'] + '?format=json').get_json()
+    assert [row.get('text') for row in rows] == ['I love this movie', None, 'Just Bob at home', 'I love Paris']
+    assert rows[1] == {'error': 'cannot analyze FAIL badly'}
+
+    exported = pd.read_csv(io.BytesIO(client.get(job['result_url']).data))
+    assert exported['text'].tolist()[2:] == ['Just Bob at home', 'I love Paris']
+    assert exported['error'].notna().tolist() == [False, True, False, False]
+
+def test_job_rejects_bad_uploads_and_unknown_ids(client):
+    response = client.post('/jobs', data=csv_upload(TEXTS, text_column='body'), content_type='multipart/form-data')
+    assert response.status_code == 400
+    assert "Column 'body' not found" in response.get_json()['error']
+    response = client.post('/jobs', data=csv_upload(TEXTS, backend='nope'), content_type='multipart/form-data')
+    assert response.status_code == 400
+    for path in ('/jobs/missing', '/jobs/missing/result', '/jobs/missing/rows', '/jobs/missing/aggregates'):
+        assert client.get(path).status_code == 404
+
+def test_batch_returns_results_and_per_item_errors_in_order(client, comprehend):
+    items = ['I love this movie', ['a', 'b'], {'text': 'Just Bob at home'}, {'text': {'x': 1}}, 'FAIL badly', None]
+    response = client.post('/analyze/batch', json={'texts': items, 'features': ['sentiment']})
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert len(results) == len(items)
+    assert results[0]['aws_sentiment'] == 'POSITIVE' and 'key_phrases' not in results[0]
+    assert results[2]['text'] == 'Just Bob at home'
+    for index in (1, 3, 5):
+        assert results[index] == {'error': 'Expected a string or an object with a string "text" field'}
+    assert results[4]['error'] == 'cannot analyze FAIL badly'
+    # Only the valid texts reached Comprehend, in one request
+    assert comprehend.texts_sent('sentiment') == ['I love this movie', 'Just Bob at home', 'FAIL badly']
+
+def test_batch_streams_ndjson_lines(client, comprehend):
+    body = '\n'.join(['"I love this movie"', '["a"]', '', 'not json', '{"text": "Just Bob at home"}']) + '\n'
+    response = client.post('/analyze/batch?features=sentiment', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    results = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [result.get('text') or result.get('error') for result in results] == [
+        'I love this movie', 'Line 2: Expected a string or an object with a string "text" field',
+        'Invalid JSON on line 4', 'Just Bob at home']
+
+def test_batch_rejects_bad_requests(client, comprehend):
+    assert client.post('/analyze/batch', json={'text': 'x'}).status_code == 400
+    assert client.post('/analyze/batch', json={'texts': ['x'], 'backend': 'nope'}).status_code == 400
+    limit = app.config['MAX_BATCH_TEXTS']
+    response = client.post('/analyze/batch', json={'texts': ['x'] * (limit + 1)})
+    assert response.status_code == 413
+    assert f'At most {limit} texts' in response.get_json()['error']
+    # NDJSON bodies stop at the limit with an error line instead of failing the whole request
+    body = '\n'.join(['"x"'] * (limit + 1))
+    response = client.post('/analyze/batch', data=body, content_type='application/x-ndjson')
+    results = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(results) == limit + 1
+    assert results[-1]['error'].startswith(f'Batch limit of {limit} texts exceeded')
+
+PAGED_TEXTS = ['i love cats', 'FAIL here', 'meet Bob today', 'i love Paris', 'just a day']
+
+def finished_job(client):
+    job = client.post('/jobs', data=csv_upload(PAGED_TEXTS), content_type='multipart/form-data').get_json()
+    assert wait_for(client, job['id'])['status'] == 'done'
+    return f"/jobs/{job['id']}"
+
+def row_indexes(client, url, **args):
+    response = client.get(url + '/rows', query_string=args)
+    assert response.status_code == 200
+    return [row['index'] for row in response.get_json()['rows']]
+
+def test_rows_are_paged_sorted_and_filtered(client, comprehend):
+    url = finished_job(client)
+    page = client.get(url + '/rows', query_string={'per_page': 2}).get_json()
+    assert (page['page'], page['per_page'], page['total_rows'], page['matching_rows'], page['pages']) == (1, 2, 5, 5, 3)
+    assert page['entity_types'] == ['PERSON']
+    assert page['rows'][0]['aws_scores']['Positive'] == 0.75
+    assert page['rows'][1] == {'error': 'cannot analyze FAIL here', 'index': 1}
+    assert row_indexes(client, url, per_page=2, page=3) == [4]
+    assert row_indexes(client, url, per_page=2, page=4) == []
+    # Out-of-range paging arguments are clamped rather than rejected
+    assert row_indexes(client, url, per_page=0, page=0) == [0]
+
+    assert row_indexes(client, url, order='desc') == [4, 3, 2, 1, 0]
+    # Ties keep input order and the failed row, which has no count, sorts last either way
+    assert row_indexes(client, url, sort='char_count') == [4, 0, 3, 2, 1]
+    assert row_indexes(client, url, sort='char_count', order='desc') == [2, 3, 0, 4, 1]
+    assert row_indexes(client, url, sort='Positive', order='desc') == [0, 3, 2, 4, 1]
+
+    assert row_indexes(client, url, sentiment='POSITIVE') == [0, 3]
+    assert row_indexes(client, url, entity_type='PERSON') == [2, 3]
+    assert row_indexes(client, url, entity_type='PLACE') == []
+    assert row_indexes(client, url, q='PARIS') == [3]
+    assert row_indexes(client, url, sentiment='POSITIVE', entity_type='PERSON', sort='char_count') == [3]
+
+    for args in ({'sort': 'error'}, {'sort': 'nope'}, {'page': 'two'}):
+        assert client.get(url + '/rows', query_string=args).status_code == 400
+
+def test_aggregates_summarize_the_job(client, comprehend):
+    url = finished_job(client)
+    summary = client.get(url + '/aggregates', query_string={'top': 1}).get_json()
+    assert summary['rows'] == 5
+    assert summary['sentiment_counts']['POSITIVE'] == 2
+    assert len(summary['top_phrases']) == 1
+    assert client.get(url + '/aggregates', query_string={'top': 'x'}).status_code == 400
+
+def test_rows_and_aggregates_wait_for_the_job(client):
+    comprehend = BlockingComprehend()
+    sentiment_analyzer.set_comprehend_client(comprehend)
+    try:
+        job = client.post('/jobs', data=csv_upload(PAGED_TEXTS), content_type='multipart/form-data').get_json()
+        for path in ('/rows', '/aggregates'):
+            response = client.get(job['status_url'] + path)
+            assert response.status_code == 409
+            assert response.get_json()['status'] in ('queued', 'running')
+    finally:
+        comprehend.release.set()
+        sentiment_analyzer.set_comprehend_client(None)
+    wait_for(client, job['id'])
+
+def test_csv_export_matches_the_cli_layout_across_chunks(client):
+    ok = {'text': 'hi Bob', 'aws_sentiment': 'NEUTRAL', 'aws_scores': {'Positive': 0.1, 'Negative': 0.1, 'Neutral': 0.8, 'Mixed': 0.0},
+          'textblob_sentiment': 'NEUTRAL', 'key_phrases': ['hi'], 'entities': [{'Text': 'Bob', 'Type': 'PERSON'}],
+          'word_count': 2, 'char_count': 6, 'error': None}
+    results = [{'error': 'cannot analyze'} if index % 700 == 0 else ok for index in range(2500)]
+    job = jobs.add_completed(results)
+    lines = client.get(f'/jobs/{job.id}/result').get_data(as_text=True).splitlines()
+    assert len(lines) == 2501 and lines[0].startswith('text,') and lines.count(lines[0]) == 1
+    # Counts stay integer in every chunk, including those with a failed row
+    assert lines[2].endswith(",['hi'],\"[{'Text': 'Bob', 'Type': 'PERSON'}]\",2,6,")
+    assert all(line.endswith(',2,6,') for line in lines[1:] if 'cannot analyze' not in line)
+    assert lines[1] == ',,,,,,,,cannot analyze'
+
+    empty = jobs.add_completed([])
+    assert client.get(f'/jobs/{empty.id}/result').get_data(as_text=True).splitlines() == [lines[0]]
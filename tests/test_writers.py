@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.results import SCORE_COLUMNS
+from src.sentiment_analyzer import result_columns
+from src.writers import OUTPUT_FORMATS, open_writer, output_format, read_results
+
+COLUMNS = result_columns()
+
+def result(text, sentiment='POSITIVE', positive=0.9):
+    return {'text': text, 'aws_sentiment': sentiment,
+            'aws_scores': {'Positive': positive, 'Negative': 0.05, 'Neutral': 0.05, 'Mixed': 0.0},
+            'textblob_sentiment': 'NEUTRAL', 'key_phrases': text.split()[:2],
+            'entities': [{'Text': word, 'Type': 'PERSON'} for word in text.split() if word.istitle()],
+            'word_count': len(text.split()), 'char_count': len(text), 'error': None}
+
+# Two chunks, the first with a failed row, so every format has to append and to keep counts integer
+CHUNKS = [
+    [result('I love Paris'), {'error': 'cannot analyze this'}, result('déjà vu, 東京', 'NEUTRAL', 0.1)],
+    [result('no entities here', 'NEGATIVE', 0.0)],
+]
+ROWS = [row for chunk in CHUNKS for row in chunk]
+
+def write(tmp_path, fmt, chunks=CHUNKS, columns=COLUMNS):
+    path = str(tmp_path / f'results.{fmt}')
+    with open_writer(path, columns) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+    assert writer.rows == sum(len(chunk) for chunk in chunks)
+    return path
+
+@pytest.mark.parametrize('fmt', ['parquet', 'arrow', 'jsonl'])
+def test_flat_formats_round_trip(tmp_path, fmt):
+    frame = read_results(write(tmp_path, fmt))
+    assert list(frame.columns) == ['text', 'aws_sentiment', *SCORE_COLUMNS, 'textblob_sentiment', 'key_phrases',
+                                   'entities', 'word_count', 'char_count', 'error']
+    assert frame['text'].tolist()[::2] == ['I love Paris', 'déjà vu, 東京']
+    assert pd.isna(frame['text'][1]) and frame['error'][1] == 'cannot analyze this'
+    assert frame['error'].isna().tolist() == [True, False, True, True]
+    assert frame['aws_sentiment'].tolist()[2:] == ['NEUTRAL', 'NEGATIVE']
+    assert frame['word_count'].tolist()[2:] == [3, 3] and pd.isna(frame['word_count'][1])
+    assert frame['char_count'][2] == len('déjà vu, 東京')
+    # Scores are stored as float32; they come back as the decimals that went in
+    assert np.allclose(frame['Positive'].astype(float).tolist()[::2], [0.9, 0.1]) and pd.isna(frame['Positive'][1])
+    assert list(frame['key_phrases'][0]) == ['I', 'love']
+    assert [dict(entity) for entity in frame['entities'][0]] == [{'Text': 'I', 'Type': 'PERSON'}, {'Text': 'Paris', 'Type': 'PERSON'}]
+    assert len(frame['entities'][3]) == 0
+    if fmt != 'jsonl':
+        assert str(frame['word_count'].dtype) == 'Int32'
+        assert frame['Positive'].dtype == np.float32
+        assert isinstance(frame['aws_sentiment'].dtype, pd.CategoricalDtype)
+
+def test_csv_keeps_the_original_layout(tmp_path):
+    path = write(tmp_path, 'csv')
+    lines = open(path, encoding='utf-8').read().splitlines()
+    assert lines[0] == ','.join(COLUMNS)
+    # One header although two chunks were written, and counts stay integer next to a failed row
+    assert len(lines) == 5
+    assert lines[1].endswith(',3,12,')
+    frame = read_results(path)
+    assert frame['text'].tolist()[2] == 'déjà vu, 東京'
+    assert frame['error'].notna().tolist() == [False, True, False, False]
+    assert frame['aws_scores'][0] == "{'Positive': 0.9, 'Negative': 0.05, 'Neutral': 0.05, 'Mixed': 0.0}"
+    assert frame['key_phrases'][0] == "['I', 'love']"
+
+def test_columns_follow_the_requested_features(tmp_path):
+    columns = result_columns(['sentiment'])
+    rows = [{column: row.get(column) for column in columns} for row in ROWS]
+    for fmt in OUTPUT_FORMATS:
+        frame = read_results(write(tmp_path, fmt, [rows], columns))
+        assert 'key_phrases' not in frame and 'entities' not in frame
+        assert frame['word_count'].tolist()[2:] == [3, 3]
+
+@pytest.mark.parametrize('fmt', OUTPUT_FORMATS)
+def test_empty_output_still_has_the_columns(tmp_path, fmt):
+    frame = read_results(write(tmp_path, fmt, []))
+    assert len(frame) == 0
+    if fmt != 'jsonl':
+        assert 'text' in frame and 'error' in frame
+
+def test_output_format_comes_from_the_extension():
+    assert output_format('out.feather') == 'arrow'
+    assert output_format('out.ndjson') == 'jsonl'
+    assert output_format('out.txt') == 'csv'
+    assert output_format('out.csv', 'parquet') == 'parquet'
+    with pytest.raises(ValueError, match='Unsupported output format'):
+        output_format('out.csv', 'xlsx')